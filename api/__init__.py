@@ -16,58 +16,82 @@
 Create and configure Flask app
 Set up logging
 Setup SQL database
+
+Creating the app does not import any data. Csv files are imported into the db with
+`flask import-data` (once per deployment) or by the scheduled refresh of uwsgi workers
+in production.
 """
 from flask import Flask
-from datetime import datetime
-from flask_sqlalchemy import SQLAlchemy
 from flask_restful import Api
 from flask_admin import Admin
 import os
-from utils.scheduler_update_csv_from_repo import scheduler
-from utils.import_tables import import_tables_from_csv
 
-# initialize extensions
-db = SQLAlchemy()
+from utils.replicas import RoutingSQLAlchemy, stick_to_primary
+
+# initialize extensions, GET requests read from replicas when SQLALCHEMY_BINDS has any
+db = RoutingSQLAlchemy()
 admin = Admin(template_mode="bootstrap3")
+api = Api()
+
+def under_uwsgi():
+    """ Returns True if app is loaded by a uwsgi worker, the uwsgi module only exists there """
+    try:
+        import uwsgi
+    except ImportError:
+        return False
+    
+    return True
+
+def create_app(config='config.config.DevelopmentConfig'):
+    """ Application factory, returns configured Flask app """
+    app = Flask(__name__)
+
+    # import configurations
+    app.config.from_object(config)
+
+    # add converters
+    from utils.custom_converters import DateConverter
+    app.url_map.converters['date'] = DateConverter
 
-app = Flask(__name__)
+    from api import routes, models, commands
 
-# import configurations
-app.config.from_object('config.config.DevelopmentConfig')
+    # initialize api with Flask application. resources are registered in routes
+    api.init_app(app)
+    app.register_blueprint(routes.bp)
 
-# initialize api with Flask application. same as api.init_app(app)
-api = Api(app)
+    # connect to db
+    try:
+        routes.init_db(app)  # calls model init_db function to initialize db session
+    except Exception as error:
+        app.logger.critical("{}: Cannot continue".format(error))
 
-# add converters
-from utils.custom_converters import DateConverter
-app.url_map.converters['date'] = DateConverter
+    # reads of the request after a write go to the primary
+    app.after_request(stick_to_primary)
 
-from api import routes, models
+    # register CLI commands e.g. `flask import-data`
+    app.cli.add_command(commands.import_data_command)
 
-# connect to db
-try:
-    routes.init_db()  # calls model init_db function to initialize db session
-except Exception as error:
-    app.logger.critical("{}: Cannot continue".format(error))
+    app.logger.info("Service initialized!")
 
-app.logger.info("Service initialized!")
+    # configure admin
+    if os.getenv("FLASK_ENV") == "development":
+        admin.init_app(app)
+        app.logger.info("Registered admin")
 
-# configure admin
-if os.getenv("FLASK_ENV") == "development":
-    admin.init_app(app)
-    app.logger.info("Registered admin")
+    # shell context for Flask CLI
+    @app.shell_context_processor
+    def context():
+        return {
+            "app": app,
+            "db": db
+            }
 
-# shell context for Flask CLI
-@app.shell_context_processor
-def context():
-    return {
-        "app": app,
-        "db": db
-        }
+    # initialize scheduler only in production uwsgi workers, not in flask CLI commands like import-data
+    if os.getenv("FLASK_ENV") == "production" and under_uwsgi():
+        from utils.scheduler_update_csv_from_repo import scheduler
+        scheduler(func=lambda: commands.refresh_data(app))
 
-# import tables from csv
-import_tables_from_csv()
+    return app
 
-# initialize scheduler only in production
-if os.getenv("FLASK_ENV") == "production":
-    scheduler()
\ No newline at end of file
+# module level app for uwsgi (module=api, callable=app) and flask CLI
+app = create_app()
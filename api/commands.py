@@ -0,0 +1,70 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CLI commands and background jobs
+
+Commands:
+---------
+flask import-data - imports time series csv files and daily reports into the app db
+flask import-data --full - imports full history even if csv files did not change
+flask import-data --reload - rebuilds table from full history in a staging copy and swaps it in
+flask import-data --batch-size 100000 - parses and loads about 100000 rows at a time to bound memory
+
+Jobs:
+-----
+refresh_data - pulls latest csv files from repo and imports changed ones, run by scheduler in production
+"""
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from api import db
+from utils.import_tables import import_tables_from_csv, import_changed_files
+from utils.import_daily_reports import import_daily_reports
+from utils.update_csv_from_repo import update_csv_from_repo
+
+@click.command("import-data")
+@click.option("--full", is_flag=True, help="Import full history even if csv files did not change.")
+@click.option("--reload", is_flag=True, help="Rebuild table from full history and swap it in when complete.")
+@click.option("--batch-size", type=int, default=None, help="Rows parsed and loaded at a time, 0 loads all dates at once.")
+@with_appcontext
+def import_data_command(full, reload, batch_size):
+    """ Import time series csv files and daily reports into the database """
+    import_tables_from_csv(
+        engine=db.engine,
+        full=full,
+        reload=reload,
+        workers=current_app.config["IMPORT_WORKERS"],
+        batch_size=current_app.config["IMPORT_BATCH_SIZE"] if batch_size is None else batch_size,
+        revision_days=current_app.config["IMPORT_REVISION_DAYS"]
+    )
+    import_daily_reports(engine=db.engine, full=full or reload, workers=current_app.config["IMPORT_WORKERS"])
+
+def refresh_data(app):
+    """ Pulls csv files from repo and imports the files changed by the pull into db of app """
+    changed_files = update_csv_from_repo()
+    
+    if not changed_files:
+        return
+    
+    with app.app_context():
+        import_changed_files(
+            changed_files,
+            engine=db.engine,
+            workers=app.config["IMPORT_WORKERS"],
+            batch_size=app.config["IMPORT_BATCH_SIZE"],
+            revision_days=app.config["IMPORT_REVISION_DAYS"]
+        )
@@ -17,7 +17,8 @@ Filters for multiple queries
 """
 
 import operator
-from utils.custom_converters import DateConverter
+from utils.custom_converters import parse_date, parse_timestamp
+from api.models import Location
 
 class QueryValidationError(Exception):
     """ Handle exceptions and return HTTP response """
@@ -40,16 +41,22 @@ class Filter:
             )
 
 def parse_value(column, value):
-    dc = DateConverter()
-    
     """ Parses the value into desired type based on column """
-    if column == 'confirmed' or column == 'deaths' or column == 'recovered':
-        return int(value)
-    elif column == 'date':
-        # parse datetime
-        return dc.to_python(value)
-    else:
-        return value
+    try:
+        if column in ('confirmed', 'deaths', 'recovered', 'new_confirmed', 'new_deaths', 'new_recovered', 'active', 'uid'):
+            return int(value)
+        elif column in ('incident_rate', 'case_fatality_ratio'):
+            return float(value)
+        elif column in ('date', 'report_date'):
+            # parse date
+            return parse_date(value)
+        elif column == 'last_update':
+            # timestamp column, accepts YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS
+            return parse_timestamp(value)
+        else:
+            return value
+    except ValueError:
+        raise QueryValidationError("Invalid value `{}` for `{}`".format(value, column))
 
 def parse_filter(filter):
     # each filter is in the form (column, 'operator, value')
@@ -85,6 +92,8 @@ def create_filters(filters):
         # check whether multiple filters
         try:
             filters_processed = [Filter(*parse_filter(filter)) for filter in filters]
+        except QueryValidationError:
+            raise
         except Exception:
             raise QueryValidationError("Invalid filter query")
     
@@ -96,13 +105,44 @@ def create_filters(filters):
     
     return filters_processed
 
+def filterable_columns(model):
+    """ Returns names of columns of model that can be filtered on, including location columns resolved through Location """
+    return set(model.__table__.columns.keys()) | set(getattr(model, "location_columns", ()))
+
+def check_filters(filters, model):
+    """ Raises QueryValidationError for filters on columns that model does not have, e.g. province of a country day """
+    columns = filterable_columns(model)
+    
+    for _filter in filters:
+        if _filter.column not in columns:
+            raise QueryValidationError(
+                "filter `{}` is not one of supported filters `{}`".format(_filter.column, tuple(sorted(columns)))
+            )
+
 def filter_query(filters, query, model):
     """ 
     filters - list of Filter objects
     query - query object
     model - Model object used to obtain column from Model
+    
+    Filters on location columns of model (e.g. country_name of GlobalTime) are resolved
+    to location ids with one query, days are then filtered on the integer key.
     """
+    check_filters(filters, model)
+    
+    location_filters = [_filter for _filter in filters if _filter.column in getattr(model, "location_columns", ())]
+    
+    if location_filters:
+        location_ids = Location.ids(*(
+            getattr(operator, _filter.operator)(getattr(Location, _filter.column), _filter.value)
+            for _filter in location_filters
+        ))
+        query = query.filter(model.location_id.in_(location_ids))
+    
     for _filter in filters:
+        if _filter in location_filters:
+            continue
+        
         # fetch operator from filter objects
         op = getattr(operator, _filter.operator)
         
@@ -19,16 +19,48 @@ All of the models are stored in this module
 
 Models
 ------
+Location - A country and province, stored once and referenced by GlobalTime through location_id
 GlobalTime - A day of a particular country with confirmed, deaths and recovered cases of COVID-19
+CountryTime - A day of a country, summed over its provinces
+WorldTime - A day of the world, summed over all countries
+USTime - A day of a particular US county with confirmed and deaths cases of COVID-19
+DailyReport - A location (country, province and county) in the JHU daily report of a particular day
 
 Attributes:
 -----------
-country_name (string) - name of country
-province (string) - name of province/state
-date (datetime) - date of particular day
+country_name (string) - name of country, read from location
+province (string) - name of province/state, read from location, empty if none
+date (date) - date of particular day
 confirmed (integer) - number of confirmed cases of COVID-19 on particular day
 deaths (integer) - number of deaths due to COVID-19 on a particular day
 recovered (integer) -  number of recoveries from COVID-19 on particular day
+new_confirmed, new_deaths, new_recovered (integer) - cases added since the previous day, computed at import,
+    empty for days created through the API without them
+
+CountryTime and WorldTime have the counts of GlobalTime, CountryTime has country_name as well.
+Both are filled by imports of GlobalTime and are read only through the API.
+
+USTime Attributes:
+-----------
+uid (integer) - JHU id of county, unique per county
+fips (string) - 5 digit FIPS code of county, empty if county has none
+county (string) - name of county (Admin2)
+province_state (string) - name of US state
+date (date) - date of particular day
+confirmed (integer) - number of confirmed cases of COVID-19 on particular day
+deaths (integer) - number of deaths due to COVID-19 on a particular day
+
+DailyReport Attributes:
+-----------
+report_date (date) - date of daily report file
+country_name (string) - name of country
+province (string) - name of province/state, empty if none
+county (string) - name of county (Admin2), empty if none
+fips (string) - 5 digit FIPS code of US county, empty if none
+last_update (datetime) - time location was last updated by JHU
+confirmed, deaths, recovered, active (integer) - cases of COVID-19, empty if not in report
+incident_rate (float) - confirmed cases per 100,000 persons, empty in reports before 05-29-2020
+case_fatality_ratio (float) - deaths per 100 confirmed cases, empty in reports before 05-29-2020
 
 Class Methods:
 -----------
@@ -69,11 +101,11 @@ class Person:
 
 # Initialize db
 from flask_sqlalchemy import SQLAlchemy
-from api import app, db
+from api import db
 import datetime
 import logging
 logger = logging.getLogger("flask.app")
-from utils.custom_converters import DateConverter  # convert str to datetime object
+from utils.custom_converters import parse_date, format_date  # convert str to date object and back
 
 class DataValidationError(Exception):
     """ 
@@ -81,19 +113,109 @@ class DataValidationError(Exception):
     """
     pass
 
+def to_date(value):
+    """ Returns date of a YYYY-MM-DD string, raises DataValidationError for anything else """
+    try:
+        return parse_date(value)
+    except (ValueError, AttributeError):
+        raise DataValidationError("Invalid date `{}`, dates must be YYYY-MM-DD".format(value))
+
+class Location(db.Model):
+    """
+    Class that represents a country and province, names are stored once here instead of on every day
+    """
+    
+    # Table schema
+    # a location is unique per country and province, (country_name, province) also serves lookups
+    # by country and province serves lookups by province
+    __table_args__ = (
+        db.Index("uq_location_country_province", "country_name", "province", unique=True),
+        db.Index("ix_location_province", "province"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    country_name = db.Column(db.String(50), nullable=False)
+    province = db.Column(db.String(50), nullable=False, default="")
+    
+    def __repr__(self):
+        return "<Location object id={}, country_name={}, province={}>".format(self.id, self.country_name, self.province)
+    
+    @classmethod
+    def find_or_create(cls, country_name, province, cache=None):
+        """
+        Returns location of given country name and province, adding it to the session if it is new
+        
+        Args:
+            cache (dict): optional (country_name, province) to location of locations already looked up, e.g. by earlier days of a batch
+        """
+        province = province or ""
+        
+        if cache is not None and (country_name, province) in cache:
+            return cache[(country_name, province)]
+        
+        location = cls.query.filter(cls.country_name == country_name, cls.province == province).one_or_none()
+        
+        if location is None:
+            logger.info("Creating location for country={}, province={}".format(country_name, province))
+            location = cls(country_name=country_name, province=province)
+            db.session.add(location)
+        
+        if cache is not None:
+            cache[(country_name, province)] = location
+        
+        return location
+    
+    @classmethod
+    def ids(cls, *criteria):
+        """ Returns list of ids of locations matching criteria, e.g. Location.country_name == 'singapore' """
+        return [row.id for row in cls.query.with_entities(cls.id).filter(*criteria)]
+
 class GlobalTime(db.Model):
     """ 
     Class that represents a day of a particular country with confirmed, deaths and recovered cases of COVID-19
     """
     
     # Table schema
+    # a day is unique per location and date so that imports can upsert, the key also serves lookups
+    # by location with or without a date range, (date, location_id) serves lookups by date or date
+    # range across locations
+    __table_args__ = (
+        db.Index("uq_global_time_location_date", "location_id", "date", unique=True),
+        db.Index("ix_global_time_date_location", "date", "location_id"),
+    )
+    
+    # filters on these columns are resolved to location ids, see api.filters.filter_query
+    location_columns = ("country_name", "province")
+    
     id = db.Column(db.Integer, primary_key=True, unique=True)
-    country_name = db.Column(db.String(20), nullable=False)
-    province = db.Column(db.String(20))
-    date = db.Column(db.DateTime, nullable=False)
+    location_id = db.Column(db.Integer, db.ForeignKey("location.id"), nullable=False)
+    date = db.Column(db.Date, nullable=False)
     confirmed = db.Column(db.Integer, nullable=False)
     deaths = db.Column(db.Integer, nullable=False)
     recovered = db.Column(db.Integer, nullable=False)
+    new_confirmed = db.Column(db.Integer)
+    new_deaths = db.Column(db.Integer)
+    new_recovered = db.Column(db.Integer)
+    
+    # names are loaded in the same query as the days
+    location = db.relationship(Location, lazy="joined")
+    
+    def __init__(self, country_name=None, province=None, **kwargs):
+        """
+        creation of object, location is looked up or created from country_name and province
+        """
+        super().__init__(**kwargs)
+        
+        if country_name is not None:
+            self.location = Location.find_or_create(country_name, province)
+    
+    @property
+    def country_name(self):
+        return self.location.country_name if self.location else None
+    
+    @property
+    def province(self):
+        return self.location.province if self.location else None
     
     def __repr__(self):
         """
@@ -109,17 +231,6 @@ class GlobalTime(db.Model):
             self.recovered
         )
    
-    # not required since deserialize function does the job of creating attributes for the object
-    # def __init__(self, country_name, province, date, confirmed, deaths, recovered):
-    #     """
-    #     creation of object
-    #     """
-    #     self.country_name = country_name
-    #     self.province = province
-    #     self.date = date
-    #     self.confirmed = confirmed
-    #     self.deaths = deaths
-    #     self.recovered = recovered
         
     def create(self):
         """
@@ -148,38 +259,50 @@ class GlobalTime(db.Model):
         """
         Serializes GlobalTime 'day' from object into a dictionary 
         """
-        dc =  DateConverter()
         return {
             "id":self.id,
             "country_name": self.country_name,
             "province": self.province,
-            "date": dc.to_url(self.date),
+            "date": format_date(self.date),
             "confirmed": self.confirmed,
             "deaths": self.deaths,
-            "recovered": self.recovered
+            "recovered": self.recovered,
+            "new_confirmed": self.new_confirmed,
+            "new_deaths": self.new_deaths,
+            "new_recovered": self.new_recovered
         }
     
-    def deserialize(self, data):
+    def deserialize(self, data, locations=None):
         """
         Deserializes GlobalTime 'day' from dictionary to object
         
         Args:
             data (dict): dictionary containing 'day' data
+            locations (dict): optional cache of locations shared by days of a batch, see Location.find_or_create
         """
-        dc = DateConverter()
         
         try:
-            self.country_name = data['country_name']
-            self.province = data['province']
-            self.date = dc.to_python(value=data['date'])
+            country_name = data['country_name']
+            province = data['province']
+            self.date = to_date(data['date'])
             self.confirmed = data['confirmed']
             self.deaths = data['deaths']
             self.recovered = data['recovered']
             
+            # new cases are optional, imports compute them from the previous day
+            self.new_confirmed = data.get('new_confirmed')
+            self.new_deaths = data.get('new_deaths')
+            self.new_recovered = data.get('new_recovered')
+            
+            # location is resolved once all fields are validated so that invalid days add no location
+            self.location = Location.find_or_create(country_name, province, cache=locations)
+            
         except KeyError as error:
             raise DataValidationError("KeyError: Missing field '" + error.args[0] + "'")
         except TypeError as error:
             raise DataValidationError("TypeError: Body of request contained bad data")
+        except ValueError as error:
+            raise DataValidationError("ValueError: {}".format(error))
         
         return self
     
@@ -192,8 +315,9 @@ class GlobalTime(db.Model):
         # initialize SQLAlchemy from Flask app
         # will create .db file in directory that models.py is located in
         db.init_app(app)
-        app.app_context().push()  # purpose?
-        db.create_all()
+        
+        with app.app_context():
+            db.create_all()
         
     @classmethod
     def all(cls):
@@ -211,13 +335,13 @@ class GlobalTime(db.Model):
     def find_by_country_name(cls, country_name):
         """ Returns all days with given country_name """
         logger.info("Processing lookup for name={}".format(country_name))
-        return cls.query.filter(cls.country_name == country_name)
+        return cls.query.filter(cls.location_id.in_(Location.ids(Location.country_name == country_name)))
         
     @classmethod
     def find_by_province(cls, province):
         """ Returns all days with given province """
         logger.info("Processing lookup for name={}".format(province))
-        return cls.query.filter(cls.province == province)
+        return cls.query.filter(cls.location_id.in_(Location.ids(Location.province == province)))
         
     @classmethod
     def find_by_date(cls, date):
@@ -228,25 +352,39 @@ class GlobalTime(db.Model):
     @classmethod
     def find_by_date_range(cls, start_date, end_date):
         """ Returns all days that fall within a date range by start date and end date """
-        dc = DateConverter()
         logger.info("Processing lookup for days within range {} and {}".format(start_date, end_date))
-        return cls.query.filter(cls.date.between(dc.to_python(value=start_date), dc.to_python(value=end_date)))
+        return cls.query.filter(cls.date.between(to_date(start_date), to_date(end_date)))
+    
+    @classmethod
+    def find_existing_keys(cls, keys):
+        """ Returns set of (location_id, date) keys that are already days in the db, looked up in one query """
+        keys = set(keys)
+        
+        if not keys:
+            return set()
+        
+        # rows of all given locations on all given dates, a superset of keys narrowed down below
+        rows = cls.query.with_entities(cls.location_id, cls.date).filter(
+            cls.location_id.in_({location_id for location_id, _ in keys}),
+            cls.date.in_({date for _, date in keys})
+        )
+        return {tuple(row) for row in rows} & keys
     
     @classmethod
     def find_by_date_and_country_name(cls, country_name, date):
         """ Returns one day that match given country name and date """
-        dc = DateConverter()
         logger.info("Processing lookup for days with country_name: '{}' and date: '{}'".format(country_name, date))
         
-        date_converted = dc.to_python(date)
-        return cls.query.filter(cls.country_name == country_name, cls.date == date_converted).all()
+        date_converted = to_date(date)
+        location_ids = Location.ids(Location.country_name == country_name)
+        return cls.query.filter(cls.location_id.in_(location_ids), cls.date == date_converted).all()
 
     @classmethod
     def find_by_date_range_and_country_name(cls, country_name, start_date, end_date):
         """ Returns all days that fall within a date range by start date and end date """
-        dc = DateConverter()
         logger.info("Processing lookup for days within range {} and {}".format(start_date, end_date))
-        return cls.query.filter(cls.country_name == country_name, cls.date.between(dc.to_python(start_date), dc.to_python(end_date)))
+        location_ids = Location.ids(Location.country_name == country_name)
+        return cls.query.filter(cls.location_id.in_(location_ids), cls.date.between(to_date(start_date), to_date(end_date)))
     
     @classmethod
     def find_by_cases_confirmed(cls, confirmed):
@@ -282,4 +420,230 @@ class GlobalTime(db.Model):
     def find_by_cases_recovered_range(cls, lower, upper):
         """ Returns all days given number of recovered cases within lower and upper bound """
         logger.info("Processing lookup for recovered cases between {} and {}".format(lower, upper))
-        pass # to write query
\ No newline at end of file
+        pass # to write query
+
+class CountryTime(db.Model):
+    """
+    Class that represents a day of a country with cases of COVID-19 summed over its provinces
+
+    Rows are only written by imports, see utils.rollups, so there are no create/save/delete methods
+    """
+    
+    # Table schema
+    # a day is unique per country and date, the key also serves lookups by country with or
+    # without a date range, (date, country_name) serves lookups by date across countries
+    __tablename__ = "country_time"
+    __table_args__ = (
+        db.Index("uq_country_time_country_date", "country_name", "date", unique=True),
+        db.Index("ix_country_time_date_country", "date", "country_name"),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    country_name = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    confirmed = db.Column(db.Integer, nullable=False)
+    deaths = db.Column(db.Integer, nullable=False)
+    recovered = db.Column(db.Integer, nullable=False)
+    new_confirmed = db.Column(db.Integer)
+    new_deaths = db.Column(db.Integer)
+    new_recovered = db.Column(db.Integer)
+    
+    def __repr__(self):
+        return "<CountryTime object id={}, country_name={}, date={}, confirmed={}, deaths={}, recovered={}>".format(
+            self.id,
+            self.country_name,
+            self.date,
+            self.confirmed,
+            self.deaths,
+            self.recovered
+        )
+    
+    def serialize(self):
+        """
+        Serializes CountryTime 'day' from object into a dictionary
+        """
+        return {
+            "id": self.id,
+            "country_name": self.country_name,
+            "date": format_date(self.date),
+            "confirmed": self.confirmed,
+            "deaths": self.deaths,
+            "recovered": self.recovered,
+            "new_confirmed": self.new_confirmed,
+            "new_deaths": self.new_deaths,
+            "new_recovered": self.new_recovered
+        }
+
+class WorldTime(db.Model):
+    """
+    Class that represents a day of the world with cases of COVID-19 summed over all countries
+
+    Rows are only written by imports, see utils.rollups, so there are no create/save/delete methods
+    """
+    
+    # Table schema
+    # a day is unique per date
+    __tablename__ = "world_time"
+    __table_args__ = (
+        db.Index("uq_world_time_date", "date", unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    date = db.Column(db.Date, nullable=False)
+    confirmed = db.Column(db.Integer, nullable=False)
+    deaths = db.Column(db.Integer, nullable=False)
+    recovered = db.Column(db.Integer, nullable=False)
+    new_confirmed = db.Column(db.Integer)
+    new_deaths = db.Column(db.Integer)
+    new_recovered = db.Column(db.Integer)
+    
+    def __repr__(self):
+        return "<WorldTime object id={}, date={}, confirmed={}, deaths={}, recovered={}>".format(
+            self.id,
+            self.date,
+            self.confirmed,
+            self.deaths,
+            self.recovered
+        )
+    
+    def serialize(self):
+        """
+        Serializes WorldTime 'day' from object into a dictionary
+        """
+        return {
+            "id": self.id,
+            "date": format_date(self.date),
+            "confirmed": self.confirmed,
+            "deaths": self.deaths,
+            "recovered": self.recovered,
+            "new_confirmed": self.new_confirmed,
+            "new_deaths": self.new_deaths,
+            "new_recovered": self.new_recovered
+        }
+
+class USTime(db.Model):
+    """
+    Class that represents a day of a particular US county with confirmed and deaths cases of COVID-19
+
+    Rows are only written by imports of the US time series csv files, so there are no create/save/delete methods
+    """
+    
+    # Table schema
+    # a day is unique per county (uid) and date so that imports can upsert
+    __tablename__ = "us_time"
+    __table_args__ = (
+        db.Index("uq_us_time_uid_date", "uid", "date", unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    uid = db.Column(db.BigInteger, nullable=False)
+    fips = db.Column(db.String(5))
+    county = db.Column(db.String(50))
+    province_state = db.Column(db.String(50), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    confirmed = db.Column(db.Integer, nullable=False)
+    deaths = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return "<USTime object id={}, uid={}, fips={}, county={}, province_state={}, date={}, confirmed={}, deaths={}>".format(
+            self.id,
+            self.uid,
+            self.fips,
+            self.county,
+            self.province_state,
+            self.date,
+            self.confirmed,
+            self.deaths
+        )
+    
+    def serialize(self):
+        """
+        Serializes USTime 'day' from object into a dictionary
+        """
+        return {
+            "id": self.id,
+            "uid": self.uid,
+            "fips": self.fips,
+            "county": self.county,
+            "province_state": self.province_state,
+            "date": format_date(self.date),
+            "confirmed": self.confirmed,
+            "deaths": self.deaths
+        }
+    
+    @classmethod
+    def find_by_id_or_404(cls, id):
+        """ Return single day by id"""
+        logger.info("Processing lookup for id={}".format(id))
+        return cls.query.get_or_404(id)
+    
+    @classmethod
+    def find_by_date_and_county(cls, county, date, province_state=None):
+        """ Returns days that match given county and date, counties with the same name are told apart by province_state """
+        logger.info("Processing lookup for days with county: '{}', province_state: '{}' and date: '{}'".format(county, province_state, date))
+        
+        query = cls.query.filter(cls.county == county, cls.date == to_date(date))
+        
+        if province_state is not None:
+            query = query.filter(cls.province_state == province_state)
+        
+        return query.all()
+
+class DailyReport(db.Model):
+    """
+    Class that represents a location in the JHU daily report of a particular day
+
+    Rows are only written by imports of the daily report files, so there are no create/save/delete methods
+    """
+    
+    # Table schema
+    # a location is unique per report date so that imports can upsert
+    __tablename__ = "daily_report"
+    __table_args__ = (
+        db.Index("uq_daily_report_date_country_province_county", "report_date", "country_name", "province", "county", unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, unique=True)
+    report_date = db.Column(db.Date, nullable=False)
+    country_name = db.Column(db.String(50), nullable=False)
+    province = db.Column(db.String(50), nullable=False)
+    county = db.Column(db.String(50), nullable=False)
+    fips = db.Column(db.String(5))
+    last_update = db.Column(db.DateTime)
+    confirmed = db.Column(db.Integer)
+    deaths = db.Column(db.Integer)
+    recovered = db.Column(db.Integer)
+    active = db.Column(db.Integer)
+    incident_rate = db.Column(db.Float)
+    case_fatality_ratio = db.Column(db.Float)
+    
+    def __repr__(self):
+        return "<DailyReport object id={}, report_date={}, country_name={}, province={}, county={}, confirmed={}, deaths={}>".format(
+            self.id,
+            self.report_date,
+            self.country_name,
+            self.province,
+            self.county,
+            self.confirmed,
+            self.deaths
+        )
+    
+    def serialize(self):
+        """
+        Serializes DailyReport location from object into a dictionary
+        """
+        return {
+            "id": self.id,
+            "report_date": format_date(self.report_date),
+            "country_name": self.country_name,
+            "province": self.province,
+            "county": self.county,
+            "fips": self.fips,
+            "last_update": self.last_update.isoformat() if self.last_update else None,
+            "confirmed": self.confirmed,
+            "deaths": self.deaths,
+            "recovered": self.recovered,
+            "active": self.active,
+            "incident_rate": self.incident_rate,
+            "case_fatality_ratio": self.case_fatality_ratio
+        }
@@ -22,31 +22,43 @@ Paths:
 
 Example:
 GET /countries - Returns list of all the days
+GET /countries?level=country&country_name=eq,united_kingdom - Returns days of a country summed over its provinces
+GET /countries?level=global - Returns days of the world summed over all countries
+POST /countries - Creates a day, or all days of a JSON array or NDJSON (application/x-ndjson) body in one transaction
+GET /us/counties?fips=eq,06037 - Returns US county days matching filters
+GET /v1/resources/daily-reports/api/reports?report_date=eq,2020-04-03 - Returns daily report locations matching filters
+GET /v1/status/pool - Returns state of the db connection pool
 GET /country?name={country_name}&start_date={start_date}&end_date={end_date} - Returns days corresponding to country, start_date and end_date
 """
 
 import os
 import sys
+import json
 import logging
 
-from flask import Flask, jsonify, request, url_for, make_response, abort
+from flask import Blueprint, current_app, jsonify, request, url_for, make_response, abort
 from flask_api import status
 from flask_restful import Resource, Api
 from werkzeug.exceptions import NotFound # find out purpose
-from utils.custom_converters import DateConverter
 from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
 
 # import SQLAlchemy as ORM
 from flask_sqlalchemy import SQLAlchemy
-from api.models import GlobalTime, DataValidationError
+from api.models import GlobalTime, CountryTime, WorldTime, USTime, DailyReport, DataValidationError
 
-# Import application
-from api import app, api
+# Import api, resources are registered on app by api.init_app in create_app
+from api import api, db
+from utils.pool_stats import pool_status
+from utils.rollups import refresh_rollups
 
 # Test filter processing
-from api.filters import Filter, create_filters, filter_query
+from api.filters import Filter, QueryValidationError, create_filters, filter_query
 
-@app.route("/", methods=["GET"])
+# routes and error handlers that are not api resources
+bp = Blueprint("routes", __name__)
+
+@bp.route("/", methods=["GET"])
 def home():
     return {
         'test': 234
@@ -56,15 +68,19 @@ def home():
 # Error Handlers
 ######################################################################
 
-@app.errorhandler(DataValidationError)
+@bp.app_errorhandler(DataValidationError)
 def request_validation_error(error):
     return bad_request(error)
 
+@bp.app_errorhandler(QueryValidationError)
+def query_validation_error(error):
+    return bad_request(error)
+
 
-@app.errorhandler(status.HTTP_400_BAD_REQUEST)
+@bp.app_errorhandler(status.HTTP_400_BAD_REQUEST)
 def bad_request(error):
     message = str(error)
-    app.logger.warning(message)
+    current_app.logger.warning(message)
     return (
         jsonify(
             status=status.HTTP_400_BAD_REQUEST, error="Bad Request", message=message
@@ -73,20 +89,20 @@ def bad_request(error):
     )
 
 
-@app.errorhandler(status.HTTP_404_NOT_FOUND)
+@bp.app_errorhandler(status.HTTP_404_NOT_FOUND)
 def not_found(error):
     message = str(error)
-    app.logger.warning(message)
+    current_app.logger.warning(message)
     return (
         jsonify(status=status.HTTP_404_NOT_FOUND, error="Not Found", message=message),
         status.HTTP_404_NOT_FOUND,
     )
 
-@app.errorhandler(status.HTTP_405_METHOD_NOT_ALLOWED)
+@bp.app_errorhandler(status.HTTP_405_METHOD_NOT_ALLOWED)
 def method_not_supported(error):
     """ Handles unsuppoted HTTP methods with 405_METHOD_NOT_SUPPORTED """
     message = str(error)
-    app.logger.warning(message)
+    current_app.logger.warning(message)
     return (
         jsonify(
             status=status.HTTP_405_METHOD_NOT_ALLOWED,
@@ -96,11 +112,11 @@ def method_not_supported(error):
         status.HTTP_405_METHOD_NOT_ALLOWED,
     )
 
-@app.errorhandler(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+@bp.app_errorhandler(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
 def mediatype_not_supported(error):
     """ Handles unsuppoted media requests with 415_UNSUPPORTED_MEDIA_TYPE """
     message = str(error)
-    app.logger.warning(message)
+    current_app.logger.warning(message)
     return (
         jsonify(
             status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
@@ -110,11 +126,11 @@ def mediatype_not_supported(error):
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
     )
 
-@app.errorhandler(status.HTTP_500_INTERNAL_SERVER_ERROR)
+@bp.app_errorhandler(status.HTTP_500_INTERNAL_SERVER_ERROR)
 def internal_server_error(error):
     """ Handles unexpected server error with 500_SERVER_ERROR """
     message = str(error)
-    app.logger.error(message)
+    current_app.logger.error(message)
     return (
         jsonify(
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -141,22 +157,36 @@ class Index(Resource):
 ######################################################################
 # LIST ALL DAYS
 ######################################################################
+
+# aggregation level of days to model, country and global days are summed at import and after days are written
+LEVELS = {
+    "province": GlobalTime,
+    "country": CountryTime,
+    "global": WorldTime
+}
+
 class GetDaysByCountryNameAndDateRangeAPI(Resource):
     def get(self):
-        """ Returns all days corresponding to args """
-        app.logger.info("Returning all days")
+        """ Returns all days corresponding to args, ?level=country or ?level=global returns summed days """
+        current_app.logger.info("Returning all days")
         days = []  # store Query objects returned from db
         
         # get args from query params. date inputs must be YYYY-MM-DD
         country_name = request.args.get('country_name')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        level = request.args.get('level', 'province')
         
-        # Generate list of Filter objects from query params
-        filters = create_filters(list(request.args.items(multi=True)))
+        if level not in LEVELS:
+            abort(400, "level `{}` is not one of supported levels `{}`".format(level, tuple(LEVELS)))
+        
+        model = LEVELS[level]
+        
+        # Generate list of Filter objects from query params, level is not a filter
+        filters = create_filters([arg for arg in request.args.items(multi=True) if arg[0] != 'level'])
 
         # Get query object from model to query
-        query = filter_query(filters, GlobalTime.query, GlobalTime)
+        query = filter_query(filters, model.query, model)
         days = query.all()
                   
         result = [day.serialize() for day in days]
@@ -164,9 +194,16 @@ class GetDaysByCountryNameAndDateRangeAPI(Resource):
     
     def post(self):
         """
-        Creates a day in the db 
+        Creates a day in the db, a JSON array or NDJSON body creates all its days in one transaction
         """
+        if request.mimetype == NDJSON:
+            return self.post_days(*parse_ndjson(request.get_data(as_text=True)))
+        
         check_content_type("application/json")
+        data = request.get_json()
+        
+        if isinstance(data, list):
+            return self.post_days(data)
         
         # create Day instance
         day = GlobalTime()
@@ -174,24 +211,20 @@ class GetDaysByCountryNameAndDateRangeAPI(Resource):
         # check if any missing keys or invalid type
         try:
             day.deserialize(
-                request.get_json()
+                data
             )
             
         except DataValidationError as error:
             abort(400, str(error))
             
-        dc = DateConverter()
-            
-        check_country_name = day.country_name
-        check_date = dc.to_url(day.date) # convert back to str
+        # a day is unique per location (country and province) and date, a new location has no days yet
+        if day.location.id is not None and GlobalTime.find_existing_keys([(day.location.id, day.date)]):
+            db.session.rollback()
+            abort(400, "Duplicate date for given country, province and date")
         
-        res = GlobalTime.find_by_date_and_country_name(check_country_name, check_date)
-        
-        if res:
-            abort(400, "Duplicate date for given country and date")
-        
-        app.logger.info("Creating day in db")
+        current_app.logger.info("Creating day in db")
         day.create()
+        refresh_levels(day.date)
         
         # transform object into json
         day_json = day.serialize()
@@ -209,6 +242,76 @@ class GetDaysByCountryNameAndDateRangeAPI(Resource):
         response.headers['Message'] = "day created"
         
         return response
+    
+    def post_days(self, items, errors=None):
+        """
+        Creates all days of items in one transaction, or none of them if any item is invalid
+        
+        Every item is validated by GlobalTime.deserialize and checked against days of the same
+        request and days in the db, the latter in one query. Errors of all items are returned
+        with their index in the body.
+        """
+        errors = list(errors or [])
+        locations = {}  # each location is looked up once per request
+        days = []
+        seen = set()
+        
+        if not items and not errors:
+            abort(400, "Body contained no days")
+        
+        current_app.logger.info("Validating {} days".format(len(items)))
+        
+        for index, data in enumerate(items):
+            if data is INVALID_LINE:
+                continue  # reported by parse_ndjson, a JSON null is validated like any other item
+            
+            try:
+                day = GlobalTime().deserialize(data, locations=locations)
+            except DataValidationError as error:
+                errors.append({"index": index, "message": str(error)})
+                continue
+            
+            key = (day.country_name, day.province, day.date)
+            if key in seen:
+                errors.append({"index": index, "message": "Duplicate date for given country, province and date in request"})
+                continue
+            
+            seen.add(key)
+            days.append((index, day))
+        
+        # days of new locations cannot exist yet, their location has no id until the insert
+        existing = GlobalTime.find_existing_keys(
+            (day.location.id, day.date) for _, day in days if day.location.id is not None
+        )
+        errors += [
+            {"index": index, "message": "Duplicate date for given country, province and date"}
+            for index, day in days if (day.location.id, day.date) in existing
+        ]
+        
+        if errors:
+            db.session.rollback()  # discard locations added by valid days
+            return invalid_days(errors)
+        
+        current_app.logger.info("Creating {} days in db".format(len(days)))
+        db.session.add_all([day for _, day in days])
+        dates = [day.date for _, day in days]
+        
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent request created one of the days after the duplicate check
+            db.session.rollback()
+            abort(400, "Duplicate date for given country, province and date")
+        
+        refresh_levels(*dates)
+        
+        response = make_response(
+            jsonify([day.serialize() for _, day in days]),
+            status.HTTP_201_CREATED
+        )
+        response.headers['Message'] = "{} days created".format(len(days))
+        
+        return response
         
 ######################################################################
 # GET DAY BY ID
@@ -218,7 +321,7 @@ class GetDayByIDAPI(Resource):
     Get a day by ID
     """
     def get(self, day_id):
-        app.logger.info("Request for day with id: {}".format(day_id))
+        current_app.logger.info("Request for day with id: {}".format(day_id))
         day = GlobalTime.find_by_id_or_404(day_id)
         
         if not day:
@@ -231,11 +334,13 @@ class GetDayByIDAPI(Resource):
     
     def put(self, day_id):
         """ Update a day by ID """
-        app.logger.info("Updating day entry with id: {}".format(day_id))
+        current_app.logger.info("Updating day entry with id: {}".format(day_id))
         day = GlobalTime.find_by_id_or_404(day_id)
+        old_date = day.date
         day.deserialize(request.get_json())
         day.id = day_id
         day.save()
+        refresh_levels(old_date, day.date)
         return make_response(
             jsonify(
                 day.serialize(),
@@ -245,9 +350,11 @@ class GetDayByIDAPI(Resource):
         
     def delete(self, day_id):
         """ Update a day by ID """
-        app.logger.info("Deleting day entry with id: {}".format(day_id))
+        current_app.logger.info("Deleting day entry with id: {}".format(day_id))
         day = GlobalTime.find_by_id_or_404(day_id)
+        old_date = day.date
         day.delete()
+        refresh_levels(old_date)
         
         return make_response(
             "",
@@ -264,7 +371,7 @@ class GetDayByCountryNameAndDateAPI(Resource):
         country_name = request.args.get('country_name')
         date_input = request.args.get('date')
         
-        app.logger.info("Request for day with country_name: '{}' and date: '{}'".format(country_name, date_input))
+        current_app.logger.info("Request for day with country_name: '{}' and date: '{}'".format(country_name, date_input))
         
         days = GlobalTime.find_by_date_and_country_name(country_name, date_input) # due to all() filter, will return list of dicts
         
@@ -278,6 +385,74 @@ class GetDayByCountryNameAndDateAPI(Resource):
             status.HTTP_200_OK
         )
 
+######################################################################
+# US COUNTY DAYS
+######################################################################
+class GetUSDaysAPI(Resource):
+    def get(self):
+        """ Returns all US county days matching filters in query params, e.g. ?fips=eq,06037&date=ge,2020-04-01 """
+        current_app.logger.info("Returning all US county days")
+        
+        filters = create_filters(list(request.args.items(multi=True)))
+        days = filter_query(filters, USTime.query, USTime).all()
+        
+        result = [day.serialize() for day in days]
+        return make_response(jsonify(result), status.HTTP_200_OK)
+
+class GetUSDayByIDAPI(Resource):
+    """ Get a US county day by ID """
+    def get(self, day_id):
+        current_app.logger.info("Request for US county day with id: {}".format(day_id))
+        day = USTime.find_by_id_or_404(day_id)
+        
+        return make_response(
+            jsonify(day.serialize()),
+            status.HTTP_200_OK
+            )
+
+class GetUSDayByCountyAndDateAPI(Resource):
+    """ Get US county day by specifying county, date and optionally province_state """
+    def get(self):
+        county = request.args.get('county')
+        province_state = request.args.get('province_state')
+        date_input = request.args.get('date')
+        
+        current_app.logger.info("Request for US county day with county: '{}' and date: '{}'".format(county, date_input))
+        
+        days = USTime.find_by_date_and_county(county, date_input, province_state=province_state)
+        
+        if not days:
+            raise NotFound("Day with county: '{}' and date: '{}' was not found in the database".format(county, date_input))
+        
+        result = [day.serialize() for day in days]
+        
+        return make_response(
+            jsonify(result),
+            status.HTTP_200_OK
+        )
+
+######################################################################
+# DAILY REPORTS
+######################################################################
+class GetDailyReportsAPI(Resource):
+    def get(self):
+        """ Returns all daily report locations matching filters in query params, e.g. ?report_date=eq,2020-04-03&country_name=eq,us """
+        current_app.logger.info("Returning all daily report locations")
+        
+        filters = create_filters(list(request.args.items(multi=True)))
+        reports = filter_query(filters, DailyReport.query, DailyReport).all()
+        
+        result = [report.serialize() for report in reports]
+        return make_response(jsonify(result), status.HTTP_200_OK)
+
+######################################################################
+# STATUS
+######################################################################
+class PoolStatusAPI(Resource):
+    def get(self):
+        """ Returns state of the db connection pool, e.g. checked out connections and wait time for a connection """
+        return make_response(jsonify(pool_status(db.engine.pool)), status.HTTP_200_OK)
+
 ######################################################################
 # UPDATE DAYS
 ######################################################################
@@ -294,22 +469,60 @@ class GetDayByCountryNameAndDateAPI(Resource):
 api.add_resource(GetDaysByCountryNameAndDateRangeAPI, '/v1/resources/time-series/api/countries', endpoint='get_days_by_country_name_and_dates')
 api.add_resource(GetDayByIDAPI, '/v1/resources/time-series/api/country/<int:day_id>', endpoint='get_day_by_id')
 api.add_resource(GetDayByCountryNameAndDateAPI, '/v1/resources/time-series/api/country', endpoint='get_day_by_country_name_and_date')
+api.add_resource(GetUSDaysAPI, '/v1/resources/time-series/api/us/counties', endpoint='get_us_days')
+api.add_resource(GetUSDayByIDAPI, '/v1/resources/time-series/api/us/county/<int:day_id>', endpoint='get_us_day_by_id')
+api.add_resource(GetUSDayByCountyAndDateAPI, '/v1/resources/time-series/api/us/county', endpoint='get_us_day_by_county_and_date')
+api.add_resource(GetDailyReportsAPI, '/v1/resources/daily-reports/api/reports', endpoint='get_daily_reports')
+api.add_resource(PoolStatusAPI, '/v1/status/pool', endpoint='get_pool_status')
 # api.add_resource(CasesByCountryAndDateAPI, '/v1/resources/time-series/api/country', endpoint='cases_by_country_and_date')
 
 ######################################################################
 # UTILITY FUNCTIONS
 ######################################################################
 
-def init_db():
+def init_db(app):
     """ Initialize SQLAlchemy app """
-    global app
     GlobalTime.init_db(app)
     
+def refresh_levels(*dates):
+    """ Recomputes country and global days from the earliest of dates onwards after days were written """
+    refresh_rollups(db.engine, since=min(dates))
+
+NDJSON = "application/x-ndjson"
+
+# item of an NDJSON line that is not JSON, told apart from a line holding null
+INVALID_LINE = object()
+
+def parse_ndjson(body):
+    """ Returns list of items of an NDJSON body, INVALID_LINE for lines that are not JSON, and list of their errors """
+    items, errors = [], []
+    
+    for index, line in enumerate(line for line in body.splitlines() if line.strip()):
+        try:
+            items.append(json.loads(line))
+        except ValueError as error:
+            items.append(INVALID_LINE)
+            errors.append({"index": index, "message": "Invalid JSON: {}".format(error)})
+    
+    return items, errors
+
+def invalid_days(errors):
+    """ Returns 400 response listing errors of items of a batch by index """
+    message = "{} of the days are invalid, no days were created".format(len(errors))
+    current_app.logger.warning(message)
+    return make_response(
+        jsonify(
+            status=status.HTTP_400_BAD_REQUEST, error="Bad Request", message=message,
+            errors=sorted(errors, key=lambda error: error["index"])
+        ),
+        status.HTTP_400_BAD_REQUEST
+    )
+
 def check_content_type(content_type):
     """ Check if request header is of required content type """
     if request.headers["Content-Type"] == content_type:
-        app.logger.info("Request header of required content type: {}".format(content_type))
+        current_app.logger.info("Request header of required content type: {}".format(content_type))
         return
     
-    app.logger.error("Invalid content type: ".format(request.header["Content-Type"]))
+    current_app.logger.error("Invalid content type: ".format(request.header["Content-Type"]))
     abort(415, "Content type should be: ".format(content_type))
\ No newline at end of file
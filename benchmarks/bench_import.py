@@ -0,0 +1,109 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark for reading the global time series before loading it into the db
+
+Compares parsing the three synthetic global csv files against reading the
+columnar snapshot saved from the parsed result, and reports peak memory of
+parsing (traced with tracemalloc, so run with --workers 0) and the size of the
+parsed dataframe against the same frame with object names and int64 counts.
+Peak memory of parsing in batches of --batch-size rows is reported as well, it
+should stay flat as --dates grows.
+
+Usage:
+python -m benchmarks.bench_import --rows 280 --dates 800 --batch-size 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_parse_cases import write_synthetic_csv
+from utils.import_state import file_state
+from utils.import_tables import GLOBAL_TIME_FILES, parse_time_series, iter_time_series
+from utils import snapshot
+
+def timed(func, *args, **kwargs):
+    """ Returns (result, wall clock seconds) of func """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def peak_memory(func, *args, **kwargs):
+    """ Returns (result, peak bytes allocated while func ran) of func """
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+def wide_dtypes(df):
+    """ Returns df with the dtypes parsing used before: object names, datetime64 dates and int64 counts """
+    return df.astype({
+        "country_name": object,
+        "province": object,
+        "date": "datetime64[ns]",
+        "confirmed": "int64",
+        "deaths": "int64",
+        "recovered": "int64"
+    })
+
+def mib(size):
+    return size / 2 ** 20
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing against snapshot reads")
+    parser.add_argument("--rows", type=int, default=280)
+    parser.add_argument("--dates", type=int, default=800)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = []
+        for file_name, case_type in GLOBAL_TIME_FILES:
+            path = os.path.join(tmp_dir, file_name)
+            write_synthetic_csv(path, args.rows, args.dates)
+            files.append((path, case_type))
+        
+        key = snapshot.snapshot_key([file_state(path) for path, _ in files])
+        snapshot_dir = os.path.join(tmp_dir, "snapshots")
+        
+        df, parse_time = timed(parse_time_series, files, workers=args.workers)
+        _, parse_peak = peak_memory(parse_time_series, files, workers=args.workers)
+        _, batch_time = timed(lambda: [len(batch) for batch in iter_time_series(files, batch_size=args.batch_size, workers=args.workers)])
+        _, batch_peak = peak_memory(lambda: [len(batch) for batch in iter_time_series(files, batch_size=args.batch_size, workers=args.workers)])
+        snapshot.save_snapshot(df, "global_time", key, snapshot_dir)
+        loaded, load_time = timed(snapshot.load_snapshot, "global_time", key, snapshot_dir)
+        
+        # touch every value so that lazily mapped pages are actually read
+        _, scan_time = timed(lambda: [loaded[column].to_numpy().sum() for column in ("confirmed", "deaths", "recovered")])
+    
+    print("rows={} dates={} long rows={}".format(args.rows, args.dates, len(df)))
+    print("parse csv files:          {:.3f}s".format(parse_time))
+    print("load snapshot:            {:.3f}s".format(load_time))
+    print("load snapshot + scan:     {:.3f}s".format(load_time + scan_time))
+    print("parse in batches:         {:.3f}s".format(batch_time))
+    print("parse peak memory:        {:.1f} MiB".format(mib(parse_peak)))
+    print("batch parse peak memory:  {:.1f} MiB".format(mib(batch_peak)))
+    print("parsed frame:             {:.1f} MiB".format(mib(df.memory_usage(deep=True).sum())))
+    print("parsed frame, wide dtypes: {:.1f} MiB".format(mib(wide_dtypes(df).memory_usage(deep=True).sum())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark for parse_cases
+
+Compares the original cell-by-cell csv.DictReader parser against the columnar
+parser in utils.parse_csv_to_df on a synthetic wide time series csv.
+
+Usage:
+python -m benchmarks.bench_parse_cases --rows 280 --dates 800 --repeat 3
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import pandas as pd
+from numpy.testing import assert_array_equal
+
+from utils.parse_csv_to_df import parse_cases
+
+
+def parse_cases_legacy(csv_to_parse, case_type):
+    # original implementation, kept here as the baseline for comparison
+    data = defaultdict(list)
+    
+    with open(csv_to_parse) as csv_file:
+        csv_reader = csv.DictReader(csv_file, delimiter=",")
+        
+        for row in csv_reader:
+            curr_country = ""
+            curr_province = ""
+            
+            for key, value in row.items():
+                if key == "Country/Region" or key == "Province/State":
+                    if key == "Country/Region":
+                        curr_country = value.lower().replace(' ', '_')
+                    else:
+                        curr_province = value.lower().replace(' ', '_')
+                elif key == "Lat" or key == "Long":
+                    continue
+                else:
+                    data["Dates"].append(pd.to_datetime(key))
+                    data["Cases"].append(int(value))
+                    data["Country/Region"].append(curr_country)
+                    data["Province/State"].append(curr_province)
+    
+    df = pd.DataFrame(data, columns=["Dates", "Country/Region", "Province/State", "Cases"])
+    df.rename(columns={
+        "Dates": "dates",
+        "Country/Region": "country_name",
+        "Province/State": "province",
+        "Cases": "{}".format(case_type)
+        }, inplace=True)
+    
+    return df
+
+
+def write_synthetic_csv(path, rows, dates):
+    """ Writes a JHU style wide time series csv with given number of rows and date columns """
+    start = date(2020, 1, 22)
+    headers = ["Province/State", "Country/Region", "Lat", "Long"]
+    headers += ["{}/{}/{}".format(d.month, d.day, d.strftime("%y")) for d in (start + timedelta(days=i) for i in range(dates))]
+    
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(headers)
+        
+        for r in range(rows):
+            province = "Province {}".format(r) if r % 3 else ""
+            writer.writerow([province, "Country {}".format(r // 3), 1.0, 2.0] + [r * i for i in range(dates)])
+
+
+def time_parser(parser, path, repeat):
+    """ Returns best wall clock time in seconds over repeat runs and the last result """
+    best = None
+    result = None
+    
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser(path, "confirmed")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_cases against the legacy parser")
+    parser.add_argument("--rows", type=int, default=280)
+    parser.add_argument("--dates", type=int, default=800)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "time_series_synthetic.csv")
+        write_synthetic_csv(path, args.rows, args.dates)
+        
+        legacy_time, legacy_result = time_parser(parse_cases_legacy, path, args.repeat)
+        columnar_time, columnar_result = time_parser(parse_cases, path, args.repeat)
+    
+    # both parsers must produce the same table
+    assert_array_equal(legacy_result.to_numpy(), columnar_result.to_numpy())
+    
+    print("rows={} dates={} cells={}".format(args.rows, args.dates, args.rows * args.dates))
+    print("legacy   parse_cases: {:.3f}s".format(legacy_time))
+    print("columnar parse_cases: {:.3f}s".format(columnar_time))
+    print("speedup: {:.1f}x".format(legacy_time / columnar_time))
+
+
+if __name__ == "__main__":
+    main()
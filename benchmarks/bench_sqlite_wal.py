@@ -0,0 +1,145 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Reader latency of SQLite during an import
+
+Runs --readers threads querying date ranges of one location while a writer process
+upserts --batches frames of --rows global_time rows, like `flask import-data`. Reports reader latency
+and reads that failed with "database is locked" for the default rollback journal, the
+WAL profile and the WAL profile with read only readers.
+
+Usage:
+python -m benchmarks.bench_sqlite_wal --readers 4 --batches 10 --rows 100000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from api.models import GlobalTime, Location
+from benchmarks.bench_bulk_loader import make_frame, key_columns
+from utils.bulk_loader import SQLiteLoader
+from utils.sqlite_profile import enable_wal_profile, read_only_url
+
+def make_engines(path, profile):
+    """ Returns writer and reader engine of the db file at path for profile """
+    url = make_url("sqlite:///{}".format(path))
+    
+    if profile == "rollback":
+        return create_engine(url), create_engine(url)
+    
+    writer = enable_wal_profile(create_engine(url))
+    
+    if profile == "wal read only":
+        return writer, enable_wal_profile(create_engine(read_only_url(url)), read_only=True)
+    
+    return writer, enable_wal_profile(create_engine(url))
+
+def import_batches(path, profile, batches, df):
+    """ Upserts batches revisions of all rows of df, each in one transaction as an import does """
+    writer, _ = make_engines(path, profile)
+    
+    for batch in range(batches):
+        SQLiteLoader(writer).load("global_time", df.assign(confirmed=df["confirmed"] + batch + 1), key_columns)
+    
+    writer.dispose()
+
+def reader_loop(engine, done, latencies, errors, locations):
+    """ Queries a month of one location until done is set, appends latency of each query in seconds """
+    table = GlobalTime.__table__
+    i = 0
+    
+    while not done.is_set():
+        query = select([table]).where(table.c.location_id == i % locations + 1).where(
+            table.c.date.between(date(2020, 3, 1), date(2020, 3, 31))
+        )
+        start = time.perf_counter()
+        
+        try:
+            with engine.connect() as conn:
+                conn.execute(query).fetchall()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors.append(time.perf_counter() - start)
+        
+        i += 1
+
+def run(path, profile, readers, batches, df):
+    """ Returns reader latencies, failed reads and seconds of the import of a run of profile on a fresh db file """
+    writer, reader = make_engines(path, profile)
+    Location.__table__.create(writer)
+    GlobalTime.__table__.create(writer)
+    SQLiteLoader(writer).load("global_time", df, key_columns)
+    
+    locations = int(df["location_id"].max())
+    done = threading.Event()
+    latencies, errors = [], []
+    threads = [threading.Thread(target=reader_loop, args=(reader, done, latencies, errors, locations)) for _ in range(readers)]
+    
+    for thread in threads:
+        thread.start()
+    
+    # import runs in its own process, as the CLI does, so readers do not wait for the GIL of the writer
+    start = time.perf_counter()
+    # spawned, a forked child could inherit locks held by reader threads
+    importer = multiprocessing.get_context("spawn").Process(target=import_batches, args=(path, profile, batches, df))
+    importer.start()
+    importer.join()
+    import_seconds = time.perf_counter() - start
+    
+    done.set()
+    for thread in threads:
+        thread.join()
+    
+    reader.dispose()
+    writer.dispose()
+    
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    
+    return latencies, errors, import_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite reader latency during an import with and without WAL")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+    
+    df = make_frame(args.rows)
+    print("rows={} readers={} batches={}".format(len(df), args.readers, args.batches), flush=True)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.db")
+        
+        for profile in ("rollback", "wal", "wal read only"):
+            latencies, errors, import_seconds = run(path, profile, args.readers, args.batches, df)
+            p50, p95, p99, worst = np.percentile(np.array(latencies or [0]) * 1000, [50, 95, 99, 100])
+            print("{:<14} reads {:>7}  p50 {:7.2f} ms  p95 {:7.2f} ms  p99 {:7.2f} ms  max {:8.2f} ms  locked {:>4}  import {:6.2f} s".format(
+                profile, len(latencies), p50, p95, p99, worst, len(errors), import_seconds
+            ), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,78 @@ Global Configuration for Application
 """
 import os
 
+from utils.pool_stats import InstrumentedQueuePool
+from utils.replicas import replica_binds
+
+# env var to engine option and parser of its value, options that are not set keep the default of the driver
+POOL_ENV = [
+    ("DB_POOL_SIZE", "pool_size", int),
+    ("DB_MAX_OVERFLOW", "max_overflow", int),
+    ("DB_POOL_TIMEOUT", "pool_timeout", float),
+    ("DB_POOL_RECYCLE", "pool_recycle", int),
+    ("DB_POOL_PRE_PING", "pool_pre_ping", lambda value: value.lower() in ("1", "true", "yes"))
+]
+
+def env_flag(name, default="0"):
+    """ Returns True if env var name is 1, true or yes """
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+# options only a queue pool takes, sqlite files otherwise open a connection per checkout
+QUEUE_POOL_OPTIONS = {"pool_size", "max_overflow", "pool_timeout"}
+
+def engine_options(uri, **defaults):
+    """
+    Returns SQLALCHEMY_ENGINE_OPTIONS for uri, DB_POOL_* env vars override defaults
+
+    Pooled engines use InstrumentedQueuePool so that checkouts and wait times show up
+    on the pool status endpoint.
+    """
+    options = dict(defaults)
+
+    for env, option, parse in POOL_ENV:
+        if os.getenv(env) is not None:
+            options[option] = parse(os.getenv(env))
+
+    if uri and (not uri.startswith("sqlite") or QUEUE_POOL_OPTIONS.intersection(options)):
+        options["poolclass"] = InstrumentedQueuePool
+    
+    # pooled sqlite connections are handed to whichever request thread checks them out next
+    if uri and uri.startswith("sqlite") and "poolclass" in options:
+        options["connect_args"] = {"check_same_thread": False}
+
+    return options
+
 class BaseConfig:
     TESTING = os.getenv("TESTING")
     SQLALCHEMY_TRACK_MODIFICATIONS = os.getenv("SQLALCHEMY_TRACK_MODIFICATIONS")
+    IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "3"))  # processes used to parse csv files on import
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "0"))  # rows parsed and loaded at a time on import, 0 for all at once
+    IMPORT_REVISION_DAYS = int(os.getenv("IMPORT_REVISION_DAYS", "14"))  # days before the last imported date upserted again when csv files changed, 0 for new dates only
+    SQLALCHEMY_BINDS = replica_binds(os.getenv("DATABASE_REPLICA_URIS"))  # comma separated read replicas of the db, GET requests read from them
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))  # a client reads from the primary this long after it wrote
+    SQLITE_WAL = env_flag("SQLITE_WAL", "1")  # sqlite db in WAL mode, API requests keep reading while an import writes
+    SQLITE_READ_ONLY = env_flag("SQLITE_READ_ONLY")  # open sqlite db read only, for API workers that never write
     
 class DevelopmentConfig(BaseConfig):
     FLASK_ENV = 'development'
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_DEV_URI", "sqlite:///site.db") # development
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     DEBUG = True
     
 class TestingConfig(BaseConfig):
     FLASK_ENV = 'testing'
     TESTING = True
     DEBUG = True
+    IMPORT_WORKERS = 0  # parse csv files serially
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_TEST_URI", "sqlite:///test.db") # development
+    SQLALCHEMY_BINDS = {}  # replica tests configure their own
+    SQLITE_WAL = False  # keep journal mode of the checked in test.db
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     
 class ProductionConfig(BaseConfig):
     FLASK_ENV = 'production'
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_PRODUCTION_URI") # production. copy and paste postgres URI as backup once ready
+    # pre ping replaces connections the server closed while idle, recycle renews them before
+    # common idle timeouts of hosted MySQL (e.g. 300s) so pooled connections do not go stale
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, pool_recycle=280)
     SECRET_KEY = "not_confirmed"
\ No newline at end of file
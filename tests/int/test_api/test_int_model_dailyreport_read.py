@@ -0,0 +1,67 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import json
+from datetime import datetime
+
+from api import db
+from api.models import DailyReport
+
+######################################################################
+#  F I X T U R E S
+######################################################################
+
+@pytest.fixture(scope="function")
+def reports(test_database):
+    # daily reports are only written by imports, add them to db directly
+    rows = [
+        DailyReport(report_date=datetime(2020, 4, 3), country_name="singapore", province="", county="", confirmed=1114, deaths=5),
+        DailyReport(report_date=datetime(2021, 1, 1), country_name="singapore", province="", county="", confirmed=58599, deaths=29, incident_rate=1001.6),
+        DailyReport(report_date=datetime(2021, 1, 1), country_name="us", province="california", county="los_angeles", fips="06037", confirmed=790642, deaths=10552, incident_rate=7879.4)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    
+    return rows
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  READ / GET / DAILY REPORTS
+######################################################################
+
+def test_get_daily_reports_by_report_date(test_app, reports):
+    """ Test if given report_date filter, only locations of that report are returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/daily-reports/api/reports?report_date=eq,2021-01-01')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert sorted(row['country_name'] for row in data) == ["singapore", "us"]
+    assert all(row['report_date'] == "2021-01-01" for row in data)
+
+def test_get_daily_reports_by_incident_rate(test_app, reports):
+    """ Test if given incident_rate filter, rates are compared as numbers """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/daily-reports/api/reports?incident_rate=gt,2000')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert [row['county'] for row in data] == ["los_angeles"]
+    assert data[0]['fips'] == "06037"
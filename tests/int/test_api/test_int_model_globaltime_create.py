@@ -201,4 +201,24 @@ def test_add_days_duplicate_entry(test_app, test_database):
     data = json.loads(response.data.decode())
 
     assert response.status_code == 400
-    assert data['message'] == "Duplicate date for given country and date"
\ No newline at end of file
+    assert data['message'] == "Duplicate date for given country, province and date"
+
+def test_add_days_other_province_same_country_and_date(test_app, test_database):
+    """ Test if given a day of another province of a country that already has the date, the day is created """
+    client = test_app.test_client()
+    
+    for province in ("", "test province 4"):
+        response = client.post('/v1/resources/time-series/api/countries',
+                            data=json.dumps({
+                                "country_name": "unique country",
+                                "province": province,
+                                "date": "2020-04-04",
+                                "confirmed": 4,
+                                "deaths": 3,
+                                "recovered": 55
+                                }),
+                            content_type='application/json')
+        
+        assert response.status_code == 201
+    
+    assert GlobalTime.query.count() == 2
\ No newline at end of file
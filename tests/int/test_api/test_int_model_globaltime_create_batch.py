@@ -0,0 +1,130 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from datetime import date
+
+from api.models import GlobalTime, Location
+
+URL = '/v1/resources/time-series/api/countries'
+
+def make_day(country_name, province, date_input, confirmed=1):
+    return {
+        "country_name": country_name,
+        "province": province,
+        "date": date_input,
+        "confirmed": confirmed,
+        "deaths": 2,
+        "recovered": 3
+    }
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  CREATE / BATCH
+######################################################################
+
+def test_add_days_json_array(test_app, test_database):
+    """ Test if given a JSON array of valid days, all days are created """
+    client = test_app.test_client()
+    response = client.post(URL,
+                           data=json.dumps([
+                               make_day("singapore", "", "2020-04-03"),
+                               make_day("singapore", "", "2020-04-04"),
+                               make_day("united_kingdom", "bermuda", "2020-04-04")
+                           ]),
+                           content_type='application/json')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 201
+    assert [(day['country_name'], day['date']) for day in data] == [
+        ("singapore", "2020-04-03"), ("singapore", "2020-04-04"), ("united_kingdom", "2020-04-04")
+    ]
+    assert all(day['id'] for day in data)
+    assert GlobalTime.query.count() == 3
+    assert Location.query.count() == 2
+
+def test_add_days_ndjson(test_app, test_database):
+    """ Test if given an NDJSON body of valid days, all days are created """
+    client = test_app.test_client()
+    body = "\n".join(json.dumps(make_day("singapore", "", "2020-04-0{}".format(i))) for i in range(1, 4)) + "\n"
+    response = client.post(URL, data=body, content_type='application/x-ndjson')
+    
+    assert response.status_code == 201
+    assert GlobalTime.query.count() == 3
+
+def test_add_days_invalid_items_create_no_days(test_app, test_database, define_add_test_day):
+    """ Test if given a batch with invalid, duplicate and existing days, no day is created and errors are reported per item """
+    define_add_test_day("singapore", "", date(2020, 4, 4), 1, 2, 3)
+    
+    client = test_app.test_client()
+    response = client.post(URL,
+                           data=json.dumps([
+                               make_day("singapore", "", "2020-04-03"),
+                               {"country_name": "singapore", "province": ""},
+                               make_day("new_country", "", "2020-04-03"),
+                               make_day("singapore", "", "2020-04-03"),
+                               make_day("singapore", "", "2020-04-04"),
+                               make_day("singapore", "", "2020-13-01")
+                           ]),
+                           content_type='application/json')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 400
+    assert [error['index'] for error in data['errors']] == [1, 3, 4, 5]
+    assert "Missing field 'date'" in data['errors'][0]['message']
+    assert GlobalTime.query.count() == 1
+    assert Location.query.count() == 1
+
+def test_add_days_ndjson_invalid_line(test_app, test_database):
+    """ Test if given an NDJSON body with a line that is not JSON, no day is created and the line is reported """
+    client = test_app.test_client()
+    body = json.dumps(make_day("singapore", "", "2020-04-03")) + "\n{not json\n"
+    response = client.post(URL, data=body, content_type='application/x-ndjson')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 400
+    assert [error['index'] for error in data['errors']] == [1]
+    assert GlobalTime.query.count() == 0
+
+def test_add_days_empty_array(test_app, test_database):
+    """ Test if given an empty JSON array, 400 is returned """
+    client = test_app.test_client()
+    response = client.post(URL, data="[]", content_type='application/json')
+    
+    assert response.status_code == 400
+
+def test_add_days_null_items_create_no_days(test_app, test_database):
+    """ Test if given a batch with null and other non-object items, no day is created and every such item is reported """
+    client = test_app.test_client()
+    response = client.post(URL,
+                           data=json.dumps([1, "a", None, make_day("singapore", "", "2020-04-03")]),
+                           content_type='application/json')
+    ndjson_response = client.post(URL,
+                                  data=json.dumps(make_day("singapore", "", "2020-04-03")) + "\nnull\n",
+                                  content_type='application/x-ndjson')
+    
+    data = json.loads(response.data.decode())
+    ndjson_data = json.loads(ndjson_response.data.decode())
+    
+    assert response.status_code == 400
+    assert [error['index'] for error in data['errors']] == [0, 1, 2]
+    assert ndjson_response.status_code == 400
+    assert [error['index'] for error in ndjson_data['errors']] == [1]
+    assert GlobalTime.query.count() == 0
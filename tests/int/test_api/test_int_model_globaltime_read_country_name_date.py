@@ -59,4 +59,27 @@ def test_get_day_by_country_name_and_date(test_app, test_database):
     assert data[0]['date'] == "2021-06-20"
     assert data[0]['confirmed'] == 4
     assert data[0]['deaths'] == 3
-    assert data[0]['recovered'] == 55
\ No newline at end of file
+    assert data[0]['recovered'] == 55
+
+def test_get_day_by_country_name_and_unpadded_date(test_app, test_database, define_add_test_day):
+    """ Test if given a date without zero padding, e.g. 2020-4-4, the day of that date is returned """
+    define_add_test_day("singapore", "", datetime(2020, 4, 4).date(), 1, 2, 3)
+    client = test_app.test_client()
+    
+    response = client.get('/v1/resources/time-series/api/country?country_name=singapore&date=2020-4-4')
+    list_response = client.get('/v1/resources/time-series/api/countries?date=eq,2020-4-4')
+    
+    assert response.status_code == 200
+    assert json.loads(response.data.decode())[0]['date'] == "2020-04-04"
+    assert len(json.loads(list_response.data.decode())) == 1
+
+
+def test_get_day_by_country_name_and_invalid_date(test_app, test_database):
+    """ Test if given a date that is not YYYY-MM-DD, response status code is 400 """
+    client = test_app.test_client()
+    
+    response = client.get('/v1/resources/time-series/api/country?country_name=singapore&date=2020-13-01')
+    list_response = client.get('/v1/resources/time-series/api/countries?date=eq,04/04/2020')
+    
+    assert response.status_code == 400
+    assert list_response.status_code == 400
@@ -100,4 +100,30 @@ def test_get_day_by_date_range_exists(test_app, test_database):
     assert data[2]['date'] == "2020-05-26"
     assert data[2]['confirmed'] == 125
     assert data[2]['deaths'] == 235
-    assert data[2]['recovered'] == 234
\ No newline at end of file
+    assert data[2]['recovered'] == 234
+
+
+def test_get_days_filtered_by_new_cases(test_app, test_database):
+    """ Test if given a filter on new_confirmed, only days with matching new cases are returned """
+    client = test_app.test_client()
+    
+    for date, confirmed, new_confirmed in (("2020-05-20", 4, 4), ("2020-05-21", 104, 100)):
+        client.post('/v1/resources/time-series/api/countries',
+                    data=json.dumps({
+                        "country_name": "singapura",
+                        "province": "tampines",
+                        "date": date,
+                        "confirmed": confirmed,
+                        "deaths": 0,
+                        "recovered": 0,
+                        "new_confirmed": new_confirmed
+                        }),
+                    content_type='application/json')
+    
+    response = client.get('/v1/resources/time-series/api/countries?country_name=eq,singapura&new_confirmed=ge,50')
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert [day['date'] for day in data] == ["2020-05-21"]
+    assert data[0]['new_confirmed'] == 100
+    assert data[0]['new_deaths'] is None
@@ -0,0 +1,103 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+import json
+import time
+from datetime import date
+from sqlalchemy import select, func
+
+from api import db
+from api.models import Location, GlobalTime
+from utils.replicas import STICKY_COOKIE
+
+######################################################################
+#  F I X T U R E S
+######################################################################
+
+@pytest.fixture(scope="function")
+def replica(test_app, test_database, define_add_test_day, tmpdir, monkeypatch):
+    # primary and replica are two sqlite files holding different days, so each response shows which one was read
+    monkeypatch.setitem(test_app.config, "SQLALCHEMY_BINDS", {"replica_0": "sqlite:///{}".format(tmpdir.join("replica.db"))})
+    define_add_test_day("singapore", "", date(2020, 4, 4), 1000, 5, 500)
+
+    engine = db.get_engine(test_app, bind="replica_0")
+    db.Model.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(Location.__table__.insert(), [{"id": 100, "country_name": "replica_land", "province": ""}])
+        conn.execute(GlobalTime.__table__.insert(), [
+            {"id": 100, "location_id": 100, "date": date(2020, 4, 4), "confirmed": 1, "deaths": 0, "recovered": 0}
+        ])
+
+    yield engine
+    engine.dispose()
+
+def country_names(response):
+    return [day['country_name'] for day in json.loads(response.data.decode())]
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  READ / GET / REPLICA
+######################################################################
+
+def test_get_days_reads_from_replica(test_app, replica):
+    """ Test if given a replica, days are read from the replica """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries')
+
+    assert response.status_code == 200
+    assert country_names(response) == ["replica_land"]
+
+def test_get_day_by_country_name_and_date_reads_from_replica(test_app, replica):
+    """ Test if given a replica, GlobalTime.find_by_date_and_country_name reads from the replica """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/country?country_name=singapore&date=2020-04-04')
+
+    assert response.status_code == 404
+
+def test_post_day_writes_to_primary_and_next_get_reads_from_primary(test_app, replica):
+    """ Test if given a write, the day is stored on the primary and reads of the same client go to the primary """
+    client = test_app.test_client()
+    response = client.post('/v1/resources/time-series/api/countries',
+                           data=json.dumps({
+                               "country_name": "test country",
+                               "province": "",
+                               "date": "2020-04-05",
+                               "confirmed": 1,
+                               "deaths": 2,
+                               "recovered": 3
+                           }),
+                           content_type='application/json')
+
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.headers.get('Set-Cookie')
+
+    response = client.get('/v1/resources/time-series/api/countries')
+
+    assert response.status_code == 200
+    assert sorted(country_names(response)) == ["singapore", "test country"]
+
+    with replica.connect() as conn:
+        assert conn.execute(select([func.count()]).select_from(GlobalTime.__table__)).scalar() == 1
+
+def test_get_days_after_sticky_window_reads_from_replica(test_app, replica):
+    """ Test if given an expired read_primary_until cookie, days are read from the replica again """
+    client = test_app.test_client()
+    client.set_cookie("localhost", STICKY_COOKIE, str(time.time() - 1))
+    response = client.get('/v1/resources/time-series/api/countries')
+
+    assert country_names(response) == ["replica_land"]
@@ -0,0 +1,130 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+import json
+from datetime import date
+
+from api import db
+from utils.rollups import refresh_rollups
+
+######################################################################
+#  F I X T U R E S
+######################################################################
+
+@pytest.fixture(scope="function")
+def rolled_up_days(test_database, define_add_test_day):
+    # rollups are filled by imports, sum days added through the ORM the same way
+    define_add_test_day("united_kingdom", "", date(2020, 4, 4), 100, 10, 1)
+    define_add_test_day("united_kingdom", "bermuda", date(2020, 4, 4), 20, 2, 0)
+    define_add_test_day("united_kingdom", "cayman_islands", date(2020, 4, 4), 30, 3, 0)
+    define_add_test_day("singapore", "", date(2020, 4, 4), 1000, 5, 500)
+    refresh_rollups(db.engine)
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  READ / GET / LEVELS
+######################################################################
+
+def test_get_days_country_level_sums_provinces(test_app, rolled_up_days):
+    """ Test if given level=country, one day per country with cases summed over its provinces is returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?level=country&country_name=eq,united_kingdom')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert len(data) == 1
+    assert data[0]['country_name'] == "united_kingdom"
+    assert (data[0]['confirmed'], data[0]['deaths'], data[0]['recovered']) == (150, 15, 1)
+
+def test_get_days_global_level_sums_countries(test_app, rolled_up_days):
+    """ Test if given level=global, one day with cases summed over all countries is returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?level=global&date=eq,2020-04-04')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert [(day['date'], day['confirmed'], day['recovered']) for day in data] == [("2020-04-04", 1150, 501)]
+
+def test_get_days_province_level_is_default(test_app, rolled_up_days):
+    """ Test if given no level, province days are returned as stored """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?country_name=eq,united_kingdom')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert sorted(day['province'] for day in data) == ["", "bermuda", "cayman_islands"]
+
+def test_get_days_invalid_level(test_app, rolled_up_days):
+    """ Test if given unknown level, response status code is 400 """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?level=continent')
+    
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("query", ["level=global&country_name=eq,singapore", "level=country&province=eq,bermuda"])
+def test_get_days_filter_not_in_level(test_app, rolled_up_days, query):
+    """ Test if given a filter on a column the level does not have, response status code is 400 naming the filter """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?' + query)
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 400
+    assert "`{}`".format(query.split("&")[1].split("=")[0]) in data['message']
+
+######################################################################
+#  WRITES
+######################################################################
+
+def test_get_days_country_level_includes_posted_day(test_app, rolled_up_days):
+    """ Test if a day of a province is posted, its country day at level=country includes it """
+    client = test_app.test_client()
+    response = client.post('/v1/resources/time-series/api/countries',
+                           data=json.dumps({
+                               "country_name": "united_kingdom",
+                               "province": "gibraltar",
+                               "date": "2020-04-04",
+                               "confirmed": 50,
+                               "deaths": 5,
+                               "recovered": 2
+                               }),
+                           content_type='application/json')
+    
+    assert response.status_code == 201
+    
+    response = client.get('/v1/resources/time-series/api/countries?level=country&country_name=eq,united_kingdom')
+    data = json.loads(response.data.decode())
+    
+    assert [(day['date'], day['confirmed'], day['deaths'], day['recovered']) for day in data] == [("2020-04-04", 200, 20, 3)]
+
+def test_get_days_global_level_excludes_deleted_day(test_app, rolled_up_days):
+    """ Test if a day is deleted, the global day at level=global no longer includes it """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/countries?country_name=eq,singapore')
+    day_id = json.loads(response.data.decode())[0]['id']
+    
+    response = client.delete('/v1/resources/time-series/api/country/{}'.format(day_id))
+    
+    assert response.status_code == 204
+    
+    response = client.get('/v1/resources/time-series/api/countries?level=global')
+    data = json.loads(response.data.decode())
+    
+    assert [(day['date'], day['confirmed'], day['recovered']) for day in data] == [("2020-04-04", 150, 1)]
@@ -0,0 +1,87 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import json
+from datetime import datetime
+
+from api import db
+from api.models import USTime
+
+######################################################################
+#  F I X T U R E S
+######################################################################
+
+@pytest.fixture(scope="function")
+def us_days(test_database):
+    # US days are only written by imports, add them to db directly
+    days = [
+        USTime(uid=84006037, fips="06037", county="los_angeles", province_state="california", date=datetime(2020, 4, 3), confirmed=4566, deaths=89),
+        USTime(uid=84006037, fips="06037", county="los_angeles", province_state="california", date=datetime(2020, 4, 4), confirmed=5277, deaths=117),
+        USTime(uid=84001001, fips="01001", county="autauga", province_state="alabama", date=datetime(2020, 4, 4), confirmed=13, deaths=1)
+    ]
+    db.session.add_all(days)
+    db.session.commit()
+    
+    return days
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  READ / GET / US COUNTIES
+######################################################################
+
+def test_get_us_days_by_fips(test_app, us_days):
+    """ Test if given fips filter, only days of that county are returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/us/counties?fips=eq,06037')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert [day['date'] for day in data] == ["2020-04-03", "2020-04-04"]
+    assert all(day['county'] == "los_angeles" for day in data)
+
+def test_get_us_day_by_id_exists(test_app, us_days):
+    """ Test if given id of existing day, day is returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/us/county/{}'.format(us_days[2].id))
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert data['uid'] == 84001001
+    assert data['fips'] == "01001"
+    assert data['confirmed'] == 13
+    assert data['deaths'] == 1
+
+def test_get_us_day_by_county_and_date_exists(test_app, us_days):
+    """ Test if given county and date of existing day, day is returned """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/us/county?county=los_angeles&province_state=california&date=2020-04-04')
+    
+    data = json.loads(response.data.decode())
+    
+    assert response.status_code == 200
+    assert len(data) == 1
+    assert data[0]['confirmed'] == 5277
+
+def test_get_us_day_by_county_and_date_not_exists(test_app, us_days):
+    """ Test if given county without days on date, response status code is 404 """
+    client = test_app.test_client()
+    response = client.get('/v1/resources/time-series/api/us/county?county=autauga&date=2020-04-03')
+    
+    assert response.status_code == 404
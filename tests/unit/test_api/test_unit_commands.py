@@ -0,0 +1,102 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import sys
+import types
+
+from api import commands, create_app
+from utils import scheduler_update_csv_from_repo
+
+@pytest.fixture(autouse=True)
+def report_calls(monkeypatch):
+    # keep commands away from daily reports in data folder, record calls instead
+    calls = []
+    monkeypatch.setattr(commands, "import_daily_reports", lambda **kwargs: calls.append(kwargs))
+    return calls
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+
+######################################################################
+#  APP FACTORY
+######################################################################
+
+def test_create_app_does_not_import_csv(monkeypatch):
+    """ Test if creating an app does not import any csv files """
+    calls = []
+    monkeypatch.setattr(commands, "import_tables_from_csv", lambda **kwargs: calls.append(kwargs))
+    
+    create_app("config.config.TestingConfig")
+    
+    assert calls == []
+
+@pytest.mark.parametrize("uwsgi, started", [(False, False), (True, True)])
+def test_create_app_starts_scheduler_only_under_uwsgi(monkeypatch, uwsgi, started):
+    """ Test if app is created in production, scheduler is started by uwsgi workers but not by the flask CLI """
+    calls = []
+    monkeypatch.setenv("FLASK_ENV", "production")
+    monkeypatch.setattr(scheduler_update_csv_from_repo, "scheduler", lambda func: calls.append(func))
+    if uwsgi:
+        monkeypatch.setitem(sys.modules, "uwsgi", types.ModuleType("uwsgi"))
+    
+    create_app("config.config.TestingConfig")
+    
+    assert len(calls) == int(started)
+
+######################################################################
+#  IMPORT-DATA
+######################################################################
+
+def test_import_data_command_imports_since_last_import(test_app, monkeypatch):
+    """ Test if `flask import-data` imports csv files into app db """
+    calls = []
+    monkeypatch.setattr(commands, "import_tables_from_csv", lambda **kwargs: calls.append(kwargs))
+    
+    result = test_app.test_cli_runner().invoke(args=["import-data"])
+    
+    assert result.exit_code == 0
+    assert len(calls) == 1
+    assert calls[0]["full"] is False
+
+def test_import_data_command_full(test_app, monkeypatch):
+    """ Test if `flask import-data --full` imports full history """
+    calls = []
+    monkeypatch.setattr(commands, "import_tables_from_csv", lambda **kwargs: calls.append(kwargs))
+    
+    result = test_app.test_cli_runner().invoke(args=["import-data", "--full"])
+    
+    assert result.exit_code == 0
+    assert calls[0]["full"] is True
+
+def test_import_data_command_batch_size(test_app, monkeypatch):
+    """ Test if `flask import-data --batch-size` imports in batches of given size """
+    calls = []
+    monkeypatch.setattr(commands, "import_tables_from_csv", lambda **kwargs: calls.append(kwargs))
+    
+    result = test_app.test_cli_runner().invoke(args=["import-data", "--batch-size", "1000"])
+    
+    assert result.exit_code == 0
+    assert calls[0]["batch_size"] == 1000
+
+def test_import_data_command_imports_daily_reports(test_app, monkeypatch, report_calls):
+    """ Test if `flask import-data --full` imports all daily reports as well """
+    monkeypatch.setattr(commands, "import_tables_from_csv", lambda **kwargs: None)
+    
+    result = test_app.test_cli_runner().invoke(args=["import-data", "--full"])
+    
+    assert result.exit_code == 0
+    assert len(report_calls) == 1
+    assert report_calls[0]["full"] is True
@@ -14,9 +14,12 @@
 
 import pytest
 import json
-from datetime import datetime
+from datetime import datetime, date
 
-from api import routes
+from sqlalchemy import event
+
+from api import routes, db
+from api.models import GlobalTime
 
 ######################################################################
 #  T E S T   C A S E S
@@ -54,6 +57,49 @@ def test_add_days_valid_json(test_app, test_database):
 #  READ
 ######################################################################
 
+def explain_queries(call):
+    """ Runs call and returns EXPLAIN QUERY PLAN details of every SELECT it sent to the db """
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+    
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    
+    with engine.connect() as conn:
+        return [
+            [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()]
+            for statement, parameters in statements
+        ]
+
+@pytest.mark.parametrize("finder", [
+    lambda: GlobalTime.find_by_country_name("singapore").all(),
+    lambda: GlobalTime.find_by_province("bermuda").all(),
+    lambda: GlobalTime.find_by_date(date(2020, 4, 4)).all(),
+    lambda: GlobalTime.find_by_date_range("2020-04-01", "2020-04-04").all(),
+    lambda: GlobalTime.find_by_date_and_country_name("singapore", "2020-04-04"),
+    lambda: GlobalTime.find_by_date_range_and_country_name("singapore", "2020-04-01", "2020-04-04").all()
+], ids=[
+    "country_name", "province", "date", "date_range", "date_and_country_name", "date_range_and_country_name"
+])
+def test_finders_use_index(test_app, test_database, define_add_test_day, finder):
+    """ Test if each finder looks up locations and days through an index instead of scanning location or global_time """
+    define_add_test_day("singapore", "", datetime(2020, 4, 4), 1, 2, 3)
+    define_add_test_day("united_kingdom", "bermuda", datetime(2020, 4, 4), 4, 5, 6)
+    
+    plans = explain_queries(finder)
+    
+    assert plans
+    for plan in plans:
+        assert any("USING INDEX" in detail or "USING COVERING INDEX" in detail for detail in plan), plan
+        assert not any(detail.startswith("SCAN") for detail in plan), plan
+
 ######################################################################
 #  UPDATE
 ######################################################################
@@ -1,13 +1,14 @@
-from utils.custom_converters import DateConverter
+import pytest
+from utils.custom_converters import DateConverter, parse_date, parse_timestamp, format_date
 from datetime import date, datetime
 
 """ DateConverter
 """
-def test_date_converter_to_python_correct_str_to_datetime():
+def test_date_converter_to_python_correct_str_to_date():
     
     dc = DateConverter()
     test_input = "1994-05-10"
-    expected_result = datetime(1994, 5, 10)
+    expected_result = date(1994, 5, 10)
     
     result = dc.to_python(test_input)
     
@@ -24,5 +25,39 @@ def test_date_converter_to_url_correct_datetime_to_str():
     
     assert result == expected_result
     assert type(result) == type(expected_result)
+
+def test_date_converter_to_url_correct_date_to_str():
+    
+    dc = DateConverter()
+    test_input = date(1994, 5, 10)
+    expected_result = "1994-05-10"
+    
+    result = dc.to_url(test_input)
+    
+    assert result == expected_result
+
+""" parse_date, format_date
+"""
+def test_format_date_round_trips_parse_date():
+    
+    assert format_date(parse_date("2020-04-04")) == "2020-04-04"
+
+def test_parse_date_unpadded_date():
+    
+    assert parse_date("2020-4-4") == date(2020, 4, 4)
+
+def test_parse_date_invalid_date_raises_value_error():
+    
+    with pytest.raises(ValueError):
+        parse_date("2020-04")
+    
+    with pytest.raises(ValueError):
+        parse_date("2020-02-30")
+
+""" parse_timestamp
+"""
+def test_parse_timestamp_date_and_time():
     
-    
\ No newline at end of file
+    assert parse_timestamp("2020-04-04") == datetime(2020, 4, 4)
+    assert parse_timestamp("2020-04-04T12:30:05") == datetime(2020, 4, 4, 12, 30, 5)
+    assert parse_timestamp("2020-04-04 12:30:05") == datetime(2020, 4, 4, 12, 30, 5)
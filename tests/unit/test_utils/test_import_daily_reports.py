@@ -0,0 +1,115 @@
+import pytest
+import os
+import shutil
+
+from sqlalchemy import create_engine
+
+from utils import import_daily_reports
+from utils.import_daily_reports import import_daily_reports as import_reports, parse_daily_report, discover_reports
+from utils.import_state import get_watermark
+from api.models import DailyReport
+from datetime import datetime
+
+# Initialize test daily reports path, one report per vintage of columns
+test_reports = os.path.join(os.path.dirname(__file__), "daily_reports")
+
+@pytest.fixture(scope="function")
+def reports_dir(tmpdir):
+    # copy test reports and a file that is not a report
+    for file_name in os.listdir(test_reports):
+        shutil.copy(os.path.join(test_reports, file_name), str(tmpdir.join(file_name)))
+    tmpdir.join("README.md").write("readme\n")
+    
+    return str(tmpdir)
+
+@pytest.fixture(scope="function")
+def engine(tmpdir):
+    engine = create_engine("sqlite:///{}".format(tmpdir.join("import.db")))
+    DailyReport.__table__.create(engine)
+    return engine
+
+def fetch_rows(engine, columns):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute("SELECT {} FROM daily_report ORDER BY report_date, country_name".format(columns))]
+
+""" discover_reports """
+def test_discover_reports_returns_reports_by_date(reports_dir):
+    # test if only report files are returned, oldest first
+    result = discover_reports(reports_dir)
+    
+    assert [date for date, _ in result] == [datetime(2020, 2, 1), datetime(2020, 4, 3), datetime(2021, 1, 1)]
+
+""" parse_daily_report """
+def test_parse_daily_report_oldest_vintage():
+    # test if report with byte order mark and slash headers is mapped onto columns, missing counts are empty
+    result = parse_daily_report(os.path.join(test_reports, "02-01-2020.csv"))
+    
+    assert list(result["country_name"]) == ["mainland_china", "singapore"]
+    assert list(result["province"]) == ["hubei", ""]
+    assert list(result["county"]) == ["", ""]
+    assert result["deaths"].isna().tolist() == [False, True]
+    assert result["incident_rate"].isna().all()
+    assert (result["report_date"] == datetime(2020, 2, 1)).all()
+
+def test_parse_daily_report_renamed_rate_columns():
+    # test if Incident_Rate vintage is parsed into same columns as Incidence_Rate, fips as 5 digit code
+    result = parse_daily_report(os.path.join(test_reports, "01-01-2021.csv"))
+    
+    assert list(result["fips"]) == ["06037", ""]
+    assert list(result["county"]) == ["los_angeles", ""]
+    assert list(result["incident_rate"]) == [7879.4, 1001.6]
+    assert list(result["active"]) == [780090, 121]
+
+""" iter_reports """
+def test_iter_reports_process_pool_same_as_serial(reports_dir):
+    # test if reports parsed in a process pool are the same as reports parsed serially, in same order
+    paths = [path for _, path in discover_reports(reports_dir)]
+    
+    serial = list(import_daily_reports.iter_reports(paths, workers=0))
+    pooled = list(import_daily_reports.iter_reports(paths, workers=2))
+    
+    assert all(a.equals(b) for a, b in zip(serial, pooled))
+    assert len(pooled) == 3
+
+""" import_daily_reports """
+def test_import_daily_reports_imports_all_vintages(reports_dir, engine):
+    # test if reports of every vintage are imported and watermark is date of latest report
+    import_reports(engine=engine, path=reports_dir)
+    
+    assert fetch_rows(engine, "country_name, county, confirmed") == [
+        ("mainland_china", "", 7153),
+        ("singapore", "", 16),
+        ("singapore", "", 1114),
+        ("us", "los_angeles", 4566),
+        ("singapore", "", 58599),
+        ("us", "los_angeles", 790642)
+    ]
+    assert get_watermark(engine, "daily_report") == datetime(2021, 1, 1)
+
+def test_import_daily_reports_parses_only_new_reports(reports_dir, engine, monkeypatch):
+    # test if a report newer than watermark is added, only that report is parsed
+    import_reports(engine=engine, path=reports_dir)
+    
+    shutil.copy(os.path.join(reports_dir, "01-01-2021.csv"), os.path.join(reports_dir, "01-02-2021.csv"))
+    parsed = []
+    monkeypatch.setattr(import_daily_reports, "parse_daily_report", lambda path, parse=parse_daily_report: parsed.append(os.path.basename(path)) or parse(path))
+    
+    import_reports(engine=engine, path=reports_dir)
+    
+    assert parsed == ["01-02-2021.csv"]
+    assert len(fetch_rows(engine, "id")) == 8
+
+def test_import_daily_reports_reimports_revised_report(reports_dir, engine):
+    # test if an already imported report is revised upstream, revised counts are applied
+    import_reports(engine=engine, path=reports_dir)
+    
+    path = os.path.join(reports_dir, "04-03-2020.csv")
+    with open(path) as f:
+        content = f.read()
+    with open(path, "w") as f:
+        f.write(content.replace(",1114,", ",1200,"))
+    
+    import_reports(engine=engine, path=reports_dir)
+    
+    assert ("singapore", "", 1200) in fetch_rows(engine, "country_name, county, confirmed")
+    assert len(fetch_rows(engine, "id")) == 6
@@ -0,0 +1,401 @@
+import pytest
+import os
+import shutil
+import pandas as pd
+
+from sqlalchemy import create_engine
+
+from utils import import_tables, snapshot
+from utils.import_tables import import_tables_from_csv, import_changed_files, parse_files, join_frames
+from utils import import_state
+from utils.import_state import get_watermark, git_blob_sha, check_files, set_file_states
+from api.models import GlobalTime, USTime, Location, CountryTime, WorldTime
+from datetime import datetime
+
+# Initialize test csv path
+test_csv = os.path.join(os.path.dirname(__file__), "test.csv")
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(monkeypatch, tmpdir):
+    # keep snapshots out of data folder
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", str(tmpdir.join("snapshots")))
+
+@pytest.fixture(scope="function")
+def time_series_dir(tmpdir):
+    # copy test csv as confirmed, deaths and recovered files
+    for case_type in ("confirmed", "deaths", "recovered"):
+        shutil.copy(test_csv, str(tmpdir.join("time_series_covid19_{}_global.csv".format(case_type))))
+    
+    return str(tmpdir)
+
+@pytest.fixture(scope="function")
+def engine(tmpdir):
+    engine = create_engine("sqlite:///{}".format(tmpdir.join("import.db")))
+    for model in (Location, GlobalTime, CountryTime, WorldTime):
+        model.__table__.create(engine)
+    return engine
+
+def append_date(time_series_dir, date_header, count):
+    # adds a date column with count for every location to confirmed, deaths and recovered files
+    for case_type in ("confirmed", "deaths", "recovered"):
+        path = os.path.join(time_series_dir, "time_series_covid19_{}_global.csv".format(case_type))
+        with open(path) as csv_file:
+            lines = csv_file.read().splitlines()
+        lines[0] += "," + date_header
+        lines[1:] = [line + ",{}".format(count) for line in lines[1:]]
+        with open(path, "w") as csv_file:
+            csv_file.write("\n".join(lines) + "\n")
+
+def revise_csv(time_series_dir, case_type, old, new):
+    # replaces old by new in the file of case_type, returns path of the file
+    path = os.path.join(time_series_dir, "time_series_covid19_{}_global.csv".format(case_type))
+    with open(path) as csv_file:
+        content = csv_file.read()
+    with open(path, "w") as csv_file:
+        csv_file.write(content.replace(old, new))
+    return path
+
+def record_loaded_dates(engine, monkeypatch):
+    # returns list that collects the sorted dates of each frame upserted by the loader of engine
+    loaded = []
+    loader = import_tables.get_loader(engine)
+    monkeypatch.setattr(import_tables, "get_loader", lambda engine: loader)
+    monkeypatch.setattr(loader, "load", lambda table_name, df, key_columns, load=loader.load: (
+        loaded.append(sorted(df["date"].dt.strftime("%Y-%m-%d").unique())), load(table_name, df, key_columns)
+    ))
+    return loaded
+
+def count_rows(engine):
+    with engine.connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM global_time").scalar()
+
+""" import_tables_from_csv """
+def test_import_tables_sets_watermark_to_latest_date(time_series_dir, engine):
+    # test if after first import, watermark is the latest date in the csv files
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    assert get_watermark(engine, "global_time") == datetime(2020, 4, 4)
+    assert count_rows(engine) == 6
+
+def test_import_tables_second_import_inserts_nothing(time_series_dir, engine):
+    # test if csv files did not gain any dates, second import does not insert any rows
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    assert count_rows(engine) == 6
+
+def test_import_tables_imports_only_new_dates(time_series_dir, engine, monkeypatch):
+    # test if csv files gain a date column and there is no revision window, only the new date is parsed and upserted
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    loaded = record_loaded_dates(engine, monkeypatch)
+    
+    append_date(time_series_dir, "4/5/2020", 1)
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, revision_days=0)
+    
+    assert loaded == [["2020-04-05"]]
+    assert get_watermark(engine, "global_time") == datetime(2020, 4, 5)
+    assert count_rows(engine) == 9
+
+def test_import_tables_incremental_import_computes_new_cases_from_imported_day(time_series_dir, engine):
+    # test if csv files gain a date column, new cases of that date are differenced against the last imported date
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    append_date(time_series_dir, "4/5/2020", 200000)
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT date, new_confirmed, new_deaths, new_recovered FROM global_time WHERE location_id = 1 ORDER BY date").fetchall()
+    
+    assert [tuple(row) for row in rows] == [
+        ("2020-04-03", 123, 123, 123),
+        ("2020-04-04", 100989, 100989, 100989),
+        ("2020-04-05", 98888, 98888, 98888)
+    ]
+
+def test_import_tables_refreshes_rollups_from_oldest_imported_date(time_series_dir, engine, monkeypatch):
+    # test if country and world days are summed after each import, imports of a revision window refresh dates of the window only
+    refreshed = []
+    monkeypatch.setattr(import_tables.GLOBAL_TIME, "refresh", lambda engine, since: refreshed.append(since) or import_tables.refresh_rollups(engine, since))
+    import_tables_from_csv(engine=engine, path=time_series_dir, revision_days=1)
+    
+    append_date(time_series_dir, "4/5/2020", 200000)
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, revision_days=1)
+    
+    with engine.connect() as conn:
+        countries = conn.execute("SELECT country_name, date, confirmed, new_confirmed FROM country_time ORDER BY country_name, date").fetchall()
+        world = conn.execute("SELECT date, confirmed FROM world_time ORDER BY date").fetchall()
+    
+    assert refreshed == [None, datetime(2020, 4, 4).date()]
+    assert [tuple(row) for row in countries] == [
+        ("singapore", "2020-04-03", 123, 123),
+        ("singapore", "2020-04-04", 101112, 100989),
+        ("singapore", "2020-04-05", 200000, 98888),
+        ("united_kingdom", "2020-04-03", 456 + 789, 456 + 789),
+        ("united_kingdom", "2020-04-04", 131415 + 161718, 131415 + 161718 - 456 - 789),
+        ("united_kingdom", "2020-04-05", 400000, 400000 - 131415 - 161718)
+    ]
+    assert [tuple(row) for row in world] == [("2020-04-03", 1368), ("2020-04-04", 394245), ("2020-04-05", 600000)]
+
+def test_import_tables_changed_files_apply_revised_counts_of_past_days(time_series_dir, engine):
+    # test if csv files revise counts of an imported day without gaining dates, next import updates that day
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    path = revise_csv(time_series_dir, "confirmed", ",123,", ",999999,")
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT confirmed, deaths FROM global_time WHERE location_id = 1 ORDER BY date").fetchall()
+    
+    assert [tuple(row) for row in rows] == [(999999, 123), (101112, 101112)]
+    assert check_files(engine, [path])[1] == []
+
+def test_import_tables_revision_window_applies_revised_counts_in_window(time_series_dir, engine, monkeypatch):
+    # test if csv files revise a day inside the revision window, the day is updated without parsing older dates
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    loaded = record_loaded_dates(engine, monkeypatch)
+    
+    revise_csv(time_series_dir, "confirmed", ",123,101112", ",999999,101113")
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, revision_days=1)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT confirmed FROM global_time WHERE location_id = 1 ORDER BY date").fetchall()
+    
+    assert loaded == [["2020-04-04"]]
+    assert [row[0] for row in rows] == [123, 101113]
+
+def test_import_tables_revision_window_parses_only_dates_in_window(time_series_dir, engine, monkeypatch):
+    # test if csv files revise days before the revision window and gain a date, only dates in the window are parsed and upserted
+    append_date(time_series_dir, "4/5/2020", 200000)
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    loaded = record_loaded_dates(engine, monkeypatch)
+    
+    revise_csv(time_series_dir, "confirmed", ",123,101112,200000", ",999999,101113,200001")
+    append_date(time_series_dir, "4/6/2020", 300000)
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, revision_days=1)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT date, confirmed FROM global_time WHERE location_id = 1 ORDER BY date").fetchall()
+    
+    assert loaded == [["2020-04-05", "2020-04-06"]]
+    assert [tuple(row) for row in rows] == [("2020-04-03", 123), ("2020-04-04", 101112), ("2020-04-05", 200001), ("2020-04-06", 300000)]
+
+def test_import_tables_full_import_does_not_duplicate_days(time_series_dir, engine):
+    # test if full history is imported twice, each day is stored once
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    import_tables_from_csv(engine=engine, path=time_series_dir, full=True)
+    
+    assert count_rows(engine) == 6
+
+def test_import_tables_full_import_applies_revised_counts(time_series_dir, engine):
+    # test if csv files revise counts of an imported day, full import updates that day only
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    revise_csv(time_series_dir, "deaths", ",123,", ",124,")
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, full=True)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT country_name, confirmed, deaths FROM global_time JOIN location ON location.id = location_id ORDER BY global_time.id").fetchall()
+    
+    assert count_rows(engine) == 6
+    assert tuple(rows[0]) == ("singapore", 123, 124)
+    assert tuple(rows[1]) == ("singapore", 101112, 101112)
+
+def test_import_tables_skips_unchanged_csv_files(time_series_dir, engine, monkeypatch):
+    # test if csv files did not change since last import, csv files are not parsed again
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    def fail_parse(*args, **kwargs):
+        raise AssertionError("unchanged csv files should not be parsed")
+    
+    monkeypatch.setattr(import_tables, "parse_cases", fail_parse)
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    assert count_rows(engine) == 6
+
+def test_import_tables_skips_touched_but_unchanged_csv_files(time_series_dir, engine, monkeypatch):
+    # test if csv files were rewritten with same content, csv files are not parsed again
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    for file_name in os.listdir(time_series_dir):
+        os.utime(os.path.join(time_series_dir, file_name), (0, 0))
+    
+    monkeypatch.setattr(import_tables, "parse_files", None)
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    assert count_rows(engine) == 6
+
+def test_check_files_reuses_recorded_sha_of_untouched_files(time_series_dir, engine, monkeypatch):
+    # test if files are untouched since their import, recorded mtime matches to the nanosecond and files are not hashed again
+    paths = [os.path.join(time_series_dir, file_name) for file_name in import_tables.GLOBAL_TIME.file_names]
+    set_file_states(engine, check_files(engine, paths)[0])
+    
+    monkeypatch.setattr(import_state, "git_blob_sha", None)
+    states, changed = check_files(engine, paths)
+    
+    assert [state["mtime_ns"] for state in states] == [os.stat(path).st_mtime_ns for path in paths]
+    assert changed == []
+
+""" git_blob_sha """
+def test_check_files_looks_up_file_names_in_chunks(tmpdir, engine, monkeypatch):
+    # test if more files are checked than file names per query, recorded states of all files are found
+    monkeypatch.setattr(import_state, "FILE_NAMES_PER_QUERY", 2)
+    paths = []
+    for i in range(5):
+        tmpdir.join("{}.csv".format(i)).write(str(i))
+        paths.append(str(tmpdir.join("{}.csv".format(i))))
+    
+    states, changed = check_files(engine, paths)
+    set_file_states(engine, states)
+    
+    assert len(changed) == 5
+    assert check_files(engine, paths)[1] == []
+
+def test_git_blob_sha_matches_git_hash_object(tmpdir):
+    # test if sha of file is same as sha computed by git for a blob with same content
+    path = tmpdir.join("file.txt")
+    path.write("hello\n")
+    
+    assert git_blob_sha(str(path)) == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+""" import_changed_files """
+def test_import_changed_files_imports_dataset_of_changed_file(time_series_dir, engine):
+    # test if one file of a dataset changed, that dataset is imported
+    result = import_changed_files(["csse_covid_19_data/csse_covid_19_time_series/time_series_covid19_deaths_global.csv"], engine=engine, path=time_series_dir)
+    
+    assert result == ["global_time"]
+    assert count_rows(engine) == 6
+
+def test_import_changed_files_ignores_unknown_files(time_series_dir, engine, monkeypatch):
+    # test if changed files do not belong to any dataset, nothing is imported
+    monkeypatch.setattr(import_tables, "parse_files", None)
+    
+    result = import_changed_files(["csse_covid_19_data/csse_covid_19_time_series/unknown.csv"], engine=engine, path=time_series_dir)
+    
+    assert result == []
+
+def test_import_changed_files_imports_changed_daily_reports(time_series_dir, engine, monkeypatch):
+    # test if a daily report changed, daily reports are imported and time series are not
+    calls = []
+    monkeypatch.setattr(import_tables, "import_daily_reports", lambda **kwargs: calls.append(kwargs))
+    
+    result = import_changed_files(["csse_covid_19_data/csse_covid_19_daily_reports/04-03-2020.csv"], engine=engine, path=time_series_dir)
+    
+    assert result == ["daily_report"]
+    assert len(calls) == 1
+    assert count_rows(engine) == 0
+
+""" parse_files """
+def test_parse_files_process_pool_same_as_serial(time_series_dir):
+    # test if files are parsed in a process pool, result is same as parsing serially
+    files = [(os.path.join(time_series_dir, "time_series_covid19_{}_global.csv".format(case_type)), case_type) for case_type in ("confirmed", "deaths")]
+    
+    serial = parse_files(files, workers=0)
+    parallel = parse_files(files, workers=2)
+    
+    for left, right in zip(serial, parallel):
+        assert left.equals(right)
+
+""" join_frames """
+def test_join_frames_inner_joins_on_country_province_date(time_series_dir):
+    # test if frames are joined, only keys present in all frames are kept with one column per case type
+    files = [(os.path.join(time_series_dir, "time_series_covid19_{}_global.csv".format(case_type)), case_type) for case_type in ("confirmed", "deaths")]
+    confirmed, deaths = parse_files(files, workers=0)
+    
+    result = join_frames([confirmed, deaths.iloc[:4]])
+    
+    assert list(result.columns) == ["country_name", "province", "dates", "confirmed", "deaths"]
+    assert len(result) == 4
+    assert list(result["confirmed"]) == list(result["deaths"])
+
+def test_import_tables_reload_rebuilds_table(time_series_dir, engine):
+    # test if table is reloaded, it holds the full history once
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    import_tables_from_csv(engine=engine, path=time_series_dir, reload=True)
+    
+    assert count_rows(engine) == 6
+    assert get_watermark(engine, "global_time") == datetime(2020, 4, 4)
+
+""" load_time_series """
+def test_load_time_series_reads_snapshot_of_unchanged_files(time_series_dir, engine, monkeypatch):
+    # test if csv files are unchanged since snapshot was taken, snapshot is read instead of csv files
+    files = [(os.path.join(time_series_dir, file_name), case_type) for file_name, case_type in import_tables.GLOBAL_TIME_FILES]
+    file_states, _ = check_files(engine, [f[0] for f in files])
+    
+    parsed = import_tables.load_time_series(files, file_states)
+    
+    monkeypatch.setattr(import_tables, "parse_files", None)
+    result = import_tables.load_time_series(files, file_states)
+    
+    assert list(result.columns) == list(parsed.columns)
+    assert result.astype(object).equals(parsed.astype(object))
+    assert result.dtypes.equals(parsed.dtypes)
+
+def test_import_tables_full_import_uses_snapshot(time_series_dir, engine, monkeypatch):
+    # test if full history is imported again from unchanged csv files, rows come from snapshot
+    import_tables_from_csv(engine=engine, path=time_series_dir)
+    
+    monkeypatch.setattr(import_tables, "parse_files", None)
+    import_tables_from_csv(engine=engine, path=time_series_dir, reload=True)
+    
+    assert count_rows(engine) == 6
+
+""" batched import """
+def test_iter_time_series_yields_one_batch_per_date_window(time_series_dir):
+    # test if batch size fits one date of 3 rows, each date is yielded as its own batch in date order
+    files = [(os.path.join(time_series_dir, file_name), case_type) for file_name, case_type in import_tables.GLOBAL_TIME_FILES]
+    
+    batches = list(import_tables.iter_time_series(files, batch_size=3))
+    
+    assert [list(batch["date"].unique()) for batch in batches] == [[datetime(2020, 4, 3)], [datetime(2020, 4, 4)]]
+    assert pd.concat(batches).astype(object).sort_values(["country_name", "date"]).reset_index(drop=True).equals(
+        import_tables.parse_time_series(files).astype(object).sort_values(["country_name", "date"]).reset_index(drop=True)
+    )
+
+def test_import_tables_in_batches_same_as_all_at_once(time_series_dir, engine, monkeypatch):
+    # test if importing in batches stores the same rows and moves watermark to the latest date
+    loaded = []
+    loader = import_tables.get_loader(engine)
+    monkeypatch.setattr(import_tables, "get_loader", lambda engine: loader)
+    monkeypatch.setattr(loader, "load", lambda table_name, df, key_columns, load=loader.load: (loaded.append(len(df)), load(table_name, df, key_columns)))
+    
+    import_tables_from_csv(engine=engine, path=time_series_dir, batch_size=3)
+    
+    assert loaded == [3, 3]
+    assert count_rows(engine) == 6
+    assert get_watermark(engine, "global_time") == datetime(2020, 4, 4)
+
+""" us_time """
+@pytest.fixture(scope="function")
+def us_time_series_dir(tmpdir):
+    # copy test US csv files only, global files are missing
+    for case_type in ("confirmed", "deaths"):
+        shutil.copy(
+            os.path.join(os.path.dirname(__file__), "test_us_{}.csv".format(case_type)),
+            str(tmpdir.join("time_series_covid19_{}_US.csv".format(case_type)))
+        )
+    
+    return str(tmpdir)
+
+def test_import_tables_imports_us_counties(us_time_series_dir, engine):
+    # test if US csv files are imported into us_time and missing global files are skipped
+    USTime.__table__.create(engine)
+    
+    import_tables_from_csv(engine=engine, path=us_time_series_dir)
+    
+    with engine.connect() as conn:
+        rows = conn.execute("SELECT uid, fips, county, province_state, confirmed, deaths FROM us_time WHERE date = '2020-04-04' ORDER BY uid").fetchall()
+    
+    assert [tuple(row) for row in rows] == [
+        (84001001, "01001", "autauga", "alabama", 13, 1),
+        (84006037, "06037", "los_angeles", "california", 5277, 117),
+        (84088888, "", "", "diamond_princess", 49, 0)
+    ]
+    assert get_watermark(engine, "us_time") == datetime(2020, 4, 4)
+    assert count_rows(engine) == 0
@@ -0,0 +1,44 @@
+import pytest
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from api.models import Location
+from utils.locations import resolve_locations
+
+@pytest.fixture(scope="function")
+def engine():
+    engine = create_engine("sqlite://")
+    Location.__table__.create(engine)
+    return engine
+
+def make_days(country_names, provinces):
+    # one day per location, names as categoricals like parsed frames
+    return pd.DataFrame({
+        "country_name": pd.Categorical(country_names),
+        "province": pd.Categorical(provinces),
+        "date": datetime(2020, 4, 4),
+        "confirmed": range(len(country_names))
+    })
+
+def test_resolve_locations_replaces_names_by_location_id(engine):
+    # test if names are replaced by ids of new locations, with rows kept in order
+    df = resolve_locations(engine, make_days(["singapore", "china", "china"], ["", "hubei", ""]))
+    
+    with engine.connect() as conn:
+        locations = {tuple(row[1:]): row[0] for row in conn.execute("SELECT id, country_name, province FROM location")}
+    
+    assert list(df.columns) == ["location_id", "date", "confirmed"]
+    assert list(df["location_id"]) == [locations[("singapore", "")], locations[("china", "hubei")], locations[("china", "")]]
+    assert list(df["confirmed"]) == [0, 1, 2]
+
+def test_resolve_locations_adds_only_new_locations(engine):
+    # test if locations already in table keep their id and only new locations are added
+    first = resolve_locations(engine, make_days(["singapore"], [""]))
+    second = resolve_locations(engine, make_days(["malaysia", "singapore"], ["", ""]))
+    
+    with engine.connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM location").scalar() == 2
+    
+    assert second["location_id"][1] == first["location_id"][0]
@@ -1,4 +1,5 @@
 import pytest
+import os
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
@@ -6,12 +7,12 @@ from pandas.testing import assert_frame_equal
 import numpy as np
 from numpy.testing import assert_array_equal
 
-from utils.parse_csv_to_df import parse_dates, parse_countries, parse_cases
+from utils.parse_csv_to_df import parse_dates, parse_countries, parse_cases, parse_us_cases
 import time
 from datetime import datetime, date
 
 # Initialize test csv pat
-test_csv = "tests\\unit\\test_utils\\test.csv"
+test_csv = os.path.join(os.path.dirname(__file__), "test.csv")
 
 """ parse_dates """
 def test_parse_dates_read_correct_csv_path():
@@ -68,4 +69,66 @@ def test_parse_cases_confirmed_correct_csv_path():
     result.to_numpy()
     expected_result.to_numpy()
     
-    assert assert_array_equal(x=result, y=expected_result) is None
\ No newline at end of file
+    assert assert_array_equal(x=result, y=expected_result) is None
+
+""" parse_cases since last import """
+def test_parse_cases_since_returns_only_newer_dates():
+    # test if given a date, only date columns after that date are parsed
+    result = parse_cases(test_csv, "confirmed", since=datetime(2020, 4, 3))
+
+    assert list(result["dates"]) == [datetime(2020, 4, 4)] * 3
+    assert list(result["country_name"]) == ["singapore", "united_kingdom", "united_kingdom"]
+    assert list(result["confirmed"]) == [101112, 131415, 161718]
+
+def test_parse_cases_since_latest_date_returns_empty_df():
+    # test if given the latest date, empty dataframe with correct headers is returned
+    result = parse_cases(test_csv, "confirmed", since=datetime(2020, 4, 4))
+
+    assert result.empty
+    assert list(result.columns) == ["dates", "country_name", "province", "confirmed"]
+
+""" parse_cases new cases """
+def test_parse_cases_new_cases_differences_previous_date():
+    # test if new cases are differences to the previous date, first date of the file against zero
+    result = parse_cases(test_csv, "confirmed", new_cases=True)
+
+    assert list(result["new_confirmed"]) == [123, 101112 - 123, 456, 131415 - 456, 789, 161718 - 789]
+
+def test_parse_cases_new_cases_since_reads_previous_date():
+    # test if given a date, first parsed date is differenced against the date column before it
+    result = parse_cases(test_csv, "confirmed", since=datetime(2020, 4, 3), new_cases=True)
+
+    assert list(result["dates"]) == [datetime(2020, 4, 4)] * 3
+    assert list(result["new_confirmed"]) == [101112 - 123, 131415 - 456, 161718 - 789]
+
+""" parse_cases dtypes """
+def test_parse_cases_returns_compact_dtypes():
+    # test if names and dates are categorical and counts are int32
+    result = parse_cases(test_csv, "confirmed")
+
+    assert str(result["country_name"].dtype) == "category"
+    assert str(result["province"].dtype) == "category"
+    assert str(result["confirmed"].dtype) == "int32"
+    assert result["dates"].cat.ordered
+    assert result["dates"].max() == datetime(2020, 4, 4)
+
+""" parse_us_cases """
+test_us_confirmed_csv = os.path.join(os.path.dirname(__file__), "test_us_confirmed.csv")
+test_us_deaths_csv = os.path.join(os.path.dirname(__file__), "test_us_deaths.csv")
+
+def test_parse_us_cases_returns_one_row_per_county_and_date():
+    # test if counties are parsed row by row, date by date with fips as 5 digit code
+    result = parse_us_cases(test_us_confirmed_csv, "confirmed")
+
+    assert list(result.columns) == ["dates", "uid", "fips", "county", "province_state", "confirmed"]
+    assert list(result["uid"]) == [84001001, 84001001, 84006037, 84006037, 84088888, 84088888]
+    assert list(result["fips"]) == ["01001", "01001", "06037", "06037", "", ""]
+    assert list(result["county"]) == ["autauga", "autauga", "los_angeles", "los_angeles", "", ""]
+    assert list(result["confirmed"]) == [12, 13, 4566, 5277, 49, 49]
+
+def test_parse_us_cases_skips_population_column():
+    # test if population column of deaths file is not parsed as a date
+    result = parse_us_cases(test_us_deaths_csv, "deaths", since=datetime(2020, 4, 3))
+
+    assert list(result["dates"]) == [datetime(2020, 4, 4)] * 3
+    assert list(result["deaths"]) == [1, 117, 0]
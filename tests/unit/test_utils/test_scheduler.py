@@ -0,0 +1,62 @@
+import pytest
+
+from utils import scheduler_update_csv_from_repo as scheduler_module
+from utils.scheduler_update_csv_from_repo import try_lock, acquire_leader_lock, run_exclusive, scheduler
+
+@pytest.fixture(scope="function")
+def no_leader(monkeypatch):
+    # each test starts without an elected leader in this process
+    monkeypatch.setattr(scheduler_module, "_leader_lock", None)
+
+""" try_lock """
+def test_try_lock_held_lock_returns_none(tmpdir):
+    # test if lock is already held, lock cannot be taken again
+    path = str(tmpdir.join("test.lock"))
+    lock_file = try_lock(path)
+    
+    assert lock_file is not None
+    assert try_lock(path) is None
+    
+    lock_file.close()
+    assert try_lock(path) is not None
+
+""" acquire_leader_lock """
+def test_acquire_leader_lock_only_one_leader(tmpdir, no_leader):
+    # test if another process is leader, current process is not elected
+    path = str(tmpdir.join("leader.lock"))
+    other_process_lock = try_lock(path)
+    
+    assert acquire_leader_lock(path) is False
+    
+    other_process_lock.close()
+    assert acquire_leader_lock(path) is True
+
+def test_scheduler_not_started_when_not_leader(tmpdir, no_leader, monkeypatch):
+    # test if another process is leader, no scheduler is started
+    path = str(tmpdir.join("leader.lock"))
+    monkeypatch.setattr(scheduler_module, "LEADER_LOCK_PATH", path)
+    other_process_lock = try_lock(path)
+    
+    assert scheduler(func=lambda: None) is None
+    
+    other_process_lock.close()
+
+""" run_exclusive """
+def test_run_exclusive_runs_func(tmpdir):
+    # test if no run is in progress, func is run
+    calls = []
+    
+    assert run_exclusive(lambda: calls.append(1), str(tmpdir.join("run.lock"))) is True
+    assert calls == [1]
+
+def test_run_exclusive_skips_overlapping_run(tmpdir):
+    # test if a run is still in progress, overlapping run is skipped
+    path = str(tmpdir.join("run.lock"))
+    calls = []
+    
+    def slow_run():
+        # a second run starting while first one holds the lock
+        calls.append(run_exclusive(lambda: calls.append("inner"), path))
+    
+    assert run_exclusive(slow_run, path) is True
+    assert calls == [False]
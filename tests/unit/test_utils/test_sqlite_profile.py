@@ -0,0 +1,53 @@
+import pytest
+import sqlite3
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from utils.sqlite_profile import enable_wal_profile, journal_mode, read_only_url
+
+@pytest.fixture(scope="function")
+def db_path(tmpdir):
+    return str(tmpdir.join("profile.db"))
+
+def test_wal_profile_sets_pragmas_on_connect(db_path):
+    # test if given the profile, connections are in WAL mode with tuned pragmas
+    engine = enable_wal_profile(create_engine("sqlite:///{}".format(db_path)))
+    
+    with engine.connect() as conn:
+        synchronous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+        mmap_size = conn.exec_driver_sql("PRAGMA mmap_size").scalar()
+        cache_size = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+    
+    assert journal_mode(engine) == "wal"
+    assert (synchronous, mmap_size, cache_size) == (1, 268435456, -65536)
+
+def test_wal_profile_readers_see_last_commit_during_write(db_path):
+    # test if a write transaction is open, readers of a WAL db read the last committed rows instead of waiting
+    engine = enable_wal_profile(create_engine("sqlite:///{}".format(db_path), connect_args={"timeout": 0}))
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE days (confirmed INTEGER)")
+        conn.exec_driver_sql("INSERT INTO days VALUES (1)")
+    
+    writer = sqlite3.connect(db_path)
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("INSERT INTO days VALUES (2)")
+        
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM days").scalar() == 1
+    finally:
+        writer.rollback()
+        writer.close()
+
+def test_read_only_url_opens_db_read_only(db_path):
+    # test if given a read only url, rows can be read but not written
+    enable_wal_profile(create_engine("sqlite:///{}".format(db_path))).execute("CREATE TABLE days (confirmed INTEGER)")
+    url = read_only_url(make_url("sqlite:///{}".format(db_path)))
+    engine = enable_wal_profile(create_engine(url), read_only=True)
+    
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM days").scalar() == 0
+        
+        with pytest.raises(Exception, match="readonly"):
+            conn.exec_driver_sql("INSERT INTO days VALUES (1)")
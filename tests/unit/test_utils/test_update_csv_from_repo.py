@@ -0,0 +1,133 @@
+import pytest
+import os
+
+import git
+
+from utils.update_csv_from_repo import update_csv_from_repo, TIME_SERIES_DIR, DAILY_REPORTS_DIR
+
+# author of test commits
+author = git.Actor("test", "test@example.com")
+
+def commit_files(repo, files, message):
+    # write files relative to repo and commit them
+    for rel_path, content in files.items():
+        path = os.path.join(repo.working_tree_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+    
+    repo.index.add(list(files.keys()))
+    repo.index.commit(message, author=author, committer=author)
+
+@pytest.fixture(scope="function")
+def repos(tmpdir):
+    # upstream working repo pushes into a local bare repo which is the remote of the local clone
+    upstream = git.Repo.init(str(tmpdir.join("upstream")))
+    commit_files(upstream, {
+        TIME_SERIES_DIR + "/time_series_covid19_confirmed_global.csv": "a\n",
+        TIME_SERIES_DIR + "/time_series_covid19_deaths_global.csv": "b\n",
+        "README.md": "readme\n"
+    }, "initial")
+    
+    remote = upstream.clone(str(tmpdir.join("remote.git")), bare=True)
+    upstream.create_remote("origin", remote.working_dir)
+    local = remote.clone(str(tmpdir.join("local")))
+    
+    return upstream, local
+
+def push(upstream):
+    upstream.remote("origin").push(upstream.active_branch.name)
+
+""" update_csv_from_repo """
+def test_update_csv_from_repo_no_new_commits_returns_empty_list(repos):
+    # test if remote has no new commits, no files are returned
+    upstream, local = repos
+    
+    assert update_csv_from_repo(local_repo_path=local.working_dir) == []
+
+def test_update_csv_from_repo_returns_changed_time_series_files(repos):
+    # test if pull brings changes, only changed files under time series folder are returned
+    upstream, local = repos
+    commit_files(upstream, {
+        TIME_SERIES_DIR + "/time_series_covid19_deaths_global.csv": "c\n",
+        TIME_SERIES_DIR + "/time_series_covid19_recovered_global.csv": "d\n",
+        "README.md": "new readme\n"
+    }, "update")
+    push(upstream)
+    
+    result = update_csv_from_repo(local_repo_path=local.working_dir)
+    
+    assert result == [
+        TIME_SERIES_DIR + "/time_series_covid19_deaths_global.csv",
+        TIME_SERIES_DIR + "/time_series_covid19_recovered_global.csv"
+    ]
+    assert local.head.commit.hexsha == upstream.head.commit.hexsha
+
+def test_update_csv_from_repo_changes_outside_time_series_returns_empty_list(repos):
+    # test if pull only changes files outside time series folder, no files are returned
+    upstream, local = repos
+    commit_files(upstream, {"README.md": "new readme\n"}, "readme")
+    push(upstream)
+    
+    assert update_csv_from_repo(local_repo_path=local.working_dir) == []
+
+""" managed checkout """
+@pytest.fixture(scope="function")
+def managed(repos, tmpdir):
+    # managed checkout of remote, file:// url so that shallow fetch is honoured for local repo
+    upstream, _ = repos
+    remote_url = "file://" + str(tmpdir.join("remote.git"))
+    local_path = str(tmpdir.join("managed"))
+    
+    changed = update_csv_from_repo(local_repo_path=local_path, remote_repo_path=remote_url)
+    
+    return upstream, git.Repo(local_path), changed
+
+def test_update_csv_from_repo_missing_repo_creates_sparse_shallow_checkout(managed):
+    # test if local repo does not exist, only time series folder of latest commit is checked out
+    upstream, local, changed = managed
+    
+    assert changed == [
+        TIME_SERIES_DIR + "/time_series_covid19_confirmed_global.csv",
+        TIME_SERIES_DIR + "/time_series_covid19_deaths_global.csv"
+    ]
+    assert os.path.exists(os.path.join(local.working_dir, TIME_SERIES_DIR, "time_series_covid19_deaths_global.csv"))
+    assert not os.path.exists(os.path.join(local.working_dir, "README.md"))
+    assert os.path.exists(os.path.join(local.git_dir, "shallow"))
+
+def test_update_csv_from_repo_managed_returns_changed_time_series_files(managed):
+    # test if remote has new commits, managed checkout fetches them and returns changed files
+    upstream, local, _ = managed
+    commit_files(upstream, {
+        TIME_SERIES_DIR + "/time_series_covid19_confirmed_global.csv": "e\n",
+        "README.md": "new readme\n"
+    }, "update")
+    push(upstream)
+    
+    result = update_csv_from_repo(local_repo_path=local.working_dir)
+    
+    assert result == [TIME_SERIES_DIR + "/time_series_covid19_confirmed_global.csv"]
+    assert local.head.commit.hexsha == upstream.head.commit.hexsha
+    assert not os.path.exists(os.path.join(local.working_dir, "README.md"))
+
+def test_update_csv_from_repo_managed_checks_out_daily_reports(managed):
+    # test if a daily report is added, managed checkout returns and checks out the report
+    upstream, local, _ = managed
+    commit_files(upstream, {DAILY_REPORTS_DIR + "/04-03-2020.csv": "f\n"}, "report")
+    push(upstream)
+    
+    result = update_csv_from_repo(local_repo_path=local.working_dir)
+    
+    assert result == [DAILY_REPORTS_DIR + "/04-03-2020.csv"]
+    assert os.path.exists(os.path.join(local.working_dir, DAILY_REPORTS_DIR, "04-03-2020.csv"))
+
+def test_update_csv_from_repo_managed_up_to_date_skips_fetch(managed, monkeypatch):
+    # test if remote branch is at local HEAD, nothing is fetched
+    upstream, local, _ = managed
+    
+    def fail_fetch(*args, **kwargs):
+        raise AssertionError("fetch should be skipped when remote has no new commits")
+    
+    monkeypatch.setattr(git.cmd.Git, "fetch", fail_fetch, raising=False)
+    
+    assert update_csv_from_repo(local_repo_path=local.working_dir) == []
@@ -1,19 +1,35 @@
 from werkzeug.routing import BaseConverter
 from datetime import datetime, date
 
+# date codec of the API, dates are YYYY-MM-DD at the boundary and date objects in the db
+def parse_date(value):
+    """ Takes in input of date string as format YYYY-MM-DD (or unpadded, e.g. 2020-4-4) and converts to date object """
+    year, month, day = value.split("-")
+    return date(int(year), int(month), int(day))
+
+def parse_timestamp(value):
+    """ Takes in input of YYYY-MM-DD, YYYY-MM-DDTHH:MM:SS or YYYY-MM-DD HH:MM:SS and converts to datetime object """
+    day, _, time = value.replace(" ", "T").partition("T")
+    day = parse_date(day)
+    hour, minute, second = (int(part) for part in time.split(":")) if time else (0, 0, 0)
+    return datetime(day.year, day.month, day.day, hour, minute, second)
+
+def format_date(value):
+    """ Takes in date (or datetime) object and converts to date string as format YYYY-MM-DD """
+    # isoformat of a datetime starts with its date
+    return value.isoformat()[:10]
+
 class DateConverter(BaseConverter):
     def __init__(self):
         pass    
         
     def to_python(self, value):
-        """ Takes in input of date string as format YYYY-MM-DD and converts to datetime object. 
+        """ Takes in input of date string as format YYYY-MM-DD and converts to date object. 
         """
-        date_string = value.split('-')
-        return datetime(int(date_string[0]), int(date_string[1]), int(date_string[2])) 
+        return parse_date(value)
         
     def to_url(self, value):
         """
-        Take in input as a datetime object
+        Take in input as a date or datetime object
         """
-        timestamp_string = value.strftime("%Y-%m-%d")
-        return timestamp_string
\ No newline at end of file
+        return format_date(value)
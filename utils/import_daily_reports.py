@@ -0,0 +1,188 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Import of JHU daily report files
+
+csse_covid_19_daily_reports has one csv file per day named MM-DD-YYYY.csv. Columns changed
+between vintages of the files (e.g. Province/State became Province_State, Admin2 and FIPS were
+added on 03-22-2020, Incidence_Rate was renamed Incident_Rate), so headers are mapped onto one
+set of columns and columns missing from a vintage are left empty.
+
+Files are parsed in a process pool and loaded into the daily_report table on the key
+(report_date, country_name, province, county). Only files dated after the last imported
+file (watermark) and files that changed since they were imported are parsed.
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from utils.import_state import get_watermark, set_watermark, check_files, set_file_states
+from utils.bulk_loader import get_loader
+
+# daily reports folder in COVID-19 repo
+DAILY_REPORTS_DIR = "csse_covid_19_data/csse_covid_19_daily_reports"
+DAILY_REPORTS_PATH = "data/COVID-19/" + DAILY_REPORTS_DIR
+
+# number of parsed report files loaded into the db at a time
+REPORTS_PER_LOAD = 50
+
+DATASET = "daily_report"
+
+KEY_COLUMNS = ["report_date", "country_name", "province", "county"]
+
+# header of any vintage to column of daily_report
+COLUMN_ALIASES = {
+    "Province/State": "province",
+    "Province_State": "province",
+    "Country/Region": "country_name",
+    "Country_Region": "country_name",
+    "Admin2": "county",
+    "FIPS": "fips",
+    "Last Update": "last_update",
+    "Last_Update": "last_update",
+    "Confirmed": "confirmed",
+    "Deaths": "deaths",
+    "Recovered": "recovered",
+    "Active": "active",
+    "Incidence_Rate": "incident_rate",
+    "Incident_Rate": "incident_rate",
+    "Case-Fatality_Ratio": "case_fatality_ratio",
+    "Case_Fatality_Ratio": "case_fatality_ratio"
+}
+
+NAME_COLUMNS = ["country_name", "province", "county"]
+COUNT_COLUMNS = ["confirmed", "deaths", "recovered", "active"]
+RATE_COLUMNS = ["incident_rate", "case_fatality_ratio"]
+
+# report files are named after the day they report on
+REPORT_FILE_NAME = re.compile(r"^(\d{2})-(\d{2})-(\d{4})\.csv$")
+
+def report_date(file_name):
+    """ Returns date of report file name MM-DD-YYYY.csv, or None if file is not a report """
+    match = REPORT_FILE_NAME.match(os.path.basename(file_name))
+
+    if match is None:
+        return None
+
+    month, day, year = (int(group) for group in match.groups())
+    return datetime(year, month, day)
+
+def discover_reports(path=DAILY_REPORTS_PATH):
+    """ Returns list of (report date, file path) of report files in path, oldest first """
+    reports = [(report_date(file_name), os.path.join(path, file_name)) for file_name in os.listdir(path)]
+    return sorted(report for report in reports if report[0] is not None)
+
+def parse_daily_report(csv_to_parse):
+    """ Parses report file of any vintage into df with columns of daily_report, one row per location """
+    # older files start with a byte order mark
+    df_raw = pd.read_csv(csv_to_parse, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    df_raw.columns = [column.strip() for column in df_raw.columns]
+
+    # unknown columns (e.g. Lat, Combined_Key) are dropped, missing ones are added empty
+    df = df_raw[[column for column in df_raw.columns if column in COLUMN_ALIASES]].rename(columns=COLUMN_ALIASES)
+    df = df.reindex(columns=["fips", "last_update"] + NAME_COLUMNS + COUNT_COLUMNS + RATE_COLUMNS, fill_value="")
+
+    for column in NAME_COLUMNS:
+        df[column] = df[column].str.strip().str.lower().str.replace(' ', '_', regex=False)
+
+    # fips is written as float in some vintages (e.g. 1001.0), stored as 5 digit code
+    fips = df["fips"].str.split(".", n=1).str[0]
+    df["fips"] = fips.where(fips == "", fips.str.zfill(5))
+
+    df["last_update"] = pd.to_datetime(df["last_update"], errors="coerce")
+
+    for column in COUNT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").round().astype("Int64")
+
+    for column in RATE_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+
+    df.insert(0, "report_date", report_date(csv_to_parse))
+
+    # a few files list a location twice, keep its last row so that the key is unique
+    return df.drop_duplicates(subset=KEY_COLUMNS, keep="last").reset_index(drop=True)
+
+def iter_reports(paths, workers=0):
+    """
+    Yields parsed report files in order of paths
+
+    Files are parsed in a process pool of up to `workers` processes while earlier files are
+    being loaded, 0 or 1 worker parses serially.
+    """
+    if not workers or workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield parse_daily_report(path)
+        return
+
+    # hundreds of small files, hand them out in chunks to keep inter process overhead low
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(parse_daily_report, paths, chunksize=max(1, len(paths) // (workers * 4)))
+
+def import_daily_reports(engine=None, full=False, path=DAILY_REPORTS_PATH, workers=0):
+    """
+    Imports daily report files into daily_report table
+
+    Files dated after the last imported file (watermark) and files that changed since they were
+    imported (by git blob sha) are parsed and upserted. If full is set all files are imported again.
+    """
+    print("Importing daily reports into database...")
+
+    if engine is None:
+        engine = create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db"), echo=False)
+
+    if not os.path.isdir(path):
+        print("Daily reports not found in {}, skipping.".format(path))
+        return
+
+    reports = discover_reports(path)
+    file_states, changed = check_files(engine, [report_path for _, report_path in reports])
+
+    since = None if full else get_watermark(engine, DATASET)
+    changed = set(changed)
+
+    to_import = [
+        report_path for date, report_path in reports
+        if since is None or date > since or os.path.basename(report_path) in changed
+    ]
+
+    if not to_import:
+        set_file_states(engine, file_states)
+        print("No new or changed daily reports, skipping.")
+        return
+
+    print("Importing {} daily reports...".format(len(to_import)))
+
+    loader = get_loader(engine)
+    frames = []
+
+    for df in iter_reports(to_import, workers=workers):
+        frames.append(df)
+
+        if len(frames) == REPORTS_PER_LOAD:
+            loader.load(DATASET, pd.concat(frames, ignore_index=True), key_columns=KEY_COLUMNS)
+            frames = []
+
+    if frames:
+        loader.load(DATASET, pd.concat(frames, ignore_index=True), key_columns=KEY_COLUMNS)
+
+    set_watermark(engine, DATASET, max(reports)[0])
+    set_file_states(engine, file_states)
+
+    print("Import complete.")
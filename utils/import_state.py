@@ -0,0 +1,139 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bookkeeping for csv imports
+
+Tables
+------
+import_state - last imported date (watermark) per dataset
+import_files - git blob sha, size and mtime in nanoseconds of each csv file after its last successful import
+
+The importer runs outside of the Flask app so these tables are defined with
+SQLAlchemy core and created on first use.
+"""
+
+import hashlib
+import os
+from sqlalchemy import MetaData, Table, Column, String, DateTime, BigInteger, select
+
+# file names looked up per query, below the 999 bound variables of sqlite before 3.32
+FILE_NAMES_PER_QUERY = 500
+
+metadata = MetaData()
+
+import_state = Table(
+    "import_state", metadata,
+    Column("dataset", String(50), primary_key=True),
+    Column("last_date", DateTime, nullable=False)
+)
+
+import_files = Table(
+    "import_files", metadata,
+    Column("file_name", String(255), primary_key=True),
+    Column("blob_sha", String(40), nullable=False),
+    Column("size", BigInteger, nullable=False),
+    Column("mtime_ns", BigInteger, nullable=False)  # integer, a FLOAT column of MySQL would round it
+)
+
+def get_watermark(engine, dataset):
+    """ Returns last imported date for dataset or None if dataset was never imported """
+    import_state.create(engine, checkfirst=True)
+    
+    with engine.connect() as conn:
+        return conn.execute(
+            select([import_state.c.last_date]).where(import_state.c.dataset == dataset)
+        ).scalar()
+
+def set_watermark(engine, dataset, last_date):
+    """ Records last_date as the last imported date for dataset """
+    import_state.create(engine, checkfirst=True)
+    
+    with engine.begin() as conn:
+        result = conn.execute(
+            import_state.update().where(import_state.c.dataset == dataset).values(last_date=last_date)
+        )
+        
+        if result.rowcount == 0:
+            conn.execute(import_state.insert().values(dataset=dataset, last_date=last_date))
+
+def git_blob_sha(path, chunk_size=1 << 20):
+    """ Returns sha of file as computed by `git hash-object`, i.e. same as blob sha in repo """
+    h = hashlib.sha1()
+    h.update("blob {}\0".format(os.path.getsize(path)).encode())
+    
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    
+    return h.hexdigest()
+
+def file_state(path, recorded=None):
+    """
+    Returns dict with blob_sha, size and mtime_ns of file
+    
+    If size and mtime_ns match the recorded state, the recorded sha is reused so an
+    untouched file costs one stat instead of a full read.
+    """
+    stat = os.stat(path)
+    state = {"file_name": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    
+    if recorded and recorded["size"] == stat.st_size and recorded["mtime_ns"] == stat.st_mtime_ns:
+        state["blob_sha"] = recorded["blob_sha"]
+    else:
+        state["blob_sha"] = git_blob_sha(path)
+    
+    return state
+
+def get_file_states(engine, paths):
+    """ Returns dict of file_name to recorded state for files that were imported before """
+    import_files.create(engine, checkfirst=True)
+    file_names = [os.path.basename(path) for path in paths]
+    rows = []
+    
+    # daily reports are over a thousand files, more than older sqlite binds in one statement
+    with engine.connect() as conn:
+        for start in range(0, len(file_names), FILE_NAMES_PER_QUERY):
+            rows += conn.execute(
+                select([import_files]).where(import_files.c.file_name.in_(file_names[start:start + FILE_NAMES_PER_QUERY]))
+            ).fetchall()
+    
+    return {row["file_name"]: dict(row) for row in rows}
+
+def check_files(engine, paths):
+    """
+    Returns current states of files and list of file names whose content changed since their last import
+    """
+    recorded = get_file_states(engine, paths)
+    states = [file_state(path, recorded.get(os.path.basename(path))) for path in paths]
+    
+    changed = [
+        state["file_name"] for state in states
+        if state["file_name"] not in recorded or recorded[state["file_name"]]["blob_sha"] != state["blob_sha"]
+    ]
+    
+    return states, changed
+
+def set_file_states(engine, states):
+    """ Records states of files after a successful import, only states that differ from recorded ones are written """
+    recorded = get_file_states(engine, [state["file_name"] for state in states])
+    states = [state for state in states if state != recorded.get(state["file_name"])]
+    
+    if not states:
+        return
+    
+    with engine.begin() as conn:
+        for state in states:
+            conn.execute(import_files.delete().where(import_files.c.file_name == state["file_name"]))
+            conn.execute(import_files.insert().values(**state))
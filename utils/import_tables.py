@@ -1,33 +1,294 @@
 import pandas as pd
 import os
-import functools
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-from utils.parse_csv_to_df import parse_cases
+from utils.parse_csv_to_df import parse_cases, parse_us_cases, read_date_headers, count_us_id_columns
+from utils.import_state import get_watermark, set_watermark, check_files, set_file_states
+from utils.bulk_loader import get_loader
+from utils.locations import resolve_locations
+from utils.rollups import refresh_rollups
+from utils.import_daily_reports import import_daily_reports, DAILY_REPORTS_DIR, DAILY_REPORTS_PATH
+from utils import snapshot
 from sqlalchemy import create_engine
 
-def import_tables_from_csv():
-    print("Importing time series csv into database...")
-    """ Imports time series covid files into current db"""
-    # find latest file in COVID-19 folder
-    path = "data/COVID-19/csse_covid_19_data/csse_covid_19_time_series"
+# time series folder in COVID-19 repo
+TIME_SERIES_PATH = "data/COVID-19/csse_covid_19_data/csse_covid_19_time_series"
+
+# days before the last imported date that are upserted again when csv files changed, JHU revises
+# counts of recent days in place, IMPORT_REVISION_DAYS of the app config
+REVISION_DAYS = 14
+
+# csv files and case type of each file in global_time dataset
+GLOBAL_TIME_FILES = [
+    ("time_series_covid19_confirmed_global.csv", "confirmed"),
+    ("time_series_covid19_deaths_global.csv", "deaths"),
+    ("time_series_covid19_recovered_global.csv", "recovered")
+]
+
+# csv files and case type of each file in us_time dataset, one row per county
+US_TIME_FILES = [
+    ("time_series_covid19_confirmed_US.csv", "confirmed"),
+    ("time_series_covid19_deaths_US.csv", "deaths")
+]
+
+class TimeSeries:
+    """ Csv files of a dataset, the parser of its files and the unique key of the table they are imported into """
+    
+    def __init__(self, name, files, parser, key_columns, n_id_columns=4, parse_keys=None, resolve_keys=None, refresh=None):
+        self.name = name  # table name, also names watermark and snapshot of dataset
+        self.files = files
+        self.parser = parser
+        self.key_columns = key_columns
+        self.n_id_columns = n_id_columns  # number of columns before dates, or callable on headers (see read_date_headers)
+        self.parse_keys = parse_keys or key_columns  # key of parsed frames if it differs from key of table
+        self.resolve_keys = resolve_keys  # callable (engine, df) replacing parse keys by keys of table, e.g. names by location_id
+        self.refresh = refresh  # callable (engine, since) run after an import with its oldest imported date, e.g. rollups
+    
+    @property
+    def file_names(self):
+        return [file_name for file_name, _ in self.files]
+    
+    @property
+    def join_keys(self):
+        """ Key columns as named in parsed frames, before dates is renamed to date """
+        return ["dates" if column == "date" else column for column in self.parse_keys]
+
+# global days also store new cases per day, see parse_cases, and are summed into country and world days
+GLOBAL_TIME = TimeSeries(
+    "global_time", GLOBAL_TIME_FILES, partial(parse_cases, new_cases=True), ["location_id", "date"],
+    parse_keys=["country_name", "province", "date"], resolve_keys=resolve_locations, refresh=refresh_rollups
+)
+US_TIME = TimeSeries("us_time", US_TIME_FILES, parse_us_cases, ["uid", "date"], n_id_columns=count_us_id_columns)
+
+def parse_files(files, since=None, workers=0, until=None, parser=parse_cases):
+    """
+    Parses list of (csv path, case type) into list of dataframes
+
+    Files are parsed in a process pool of up to `workers` processes so that wall clock time
+    follows the largest file instead of the sum of all files. 0 or 1 worker parses serially.
+    """
+    if not workers or workers <= 1 or len(files) <= 1:
+        return [parser(f[0], f[1], since=since, until=until) for f in files]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as executor:
+        return list(executor.map(
+            parser, [f[0] for f in files], [f[1] for f in files], [since] * len(files), [until] * len(files)
+        ))
+
+def join_frames(frames, keys=("country_name", "province", "dates")):
+    """
+    Inner joins case frames in one step by aligning them on shared keys
+
+    Columns other than the case column that are already in the first frame (e.g. fips of a county)
+    are taken from the first frame only.
+    """
+    keys = list(keys)
+    indexed = [frames[0].set_index(keys)] + [
+        frame[keys + [column for column in frame.columns if column not in frames[0].columns]].set_index(keys)
+        for frame in frames[1:]
+    ]
+    return pd.concat(indexed, axis=1, join="inner").reset_index()
+
+def parse_time_series(files, since=None, workers=0, until=None, series=GLOBAL_TIME):
+    """ Parses csv files of series into one dataframe with a column per case type """
+    # obtain dataframes, one per case type, and join them on key of series, e.g. (country, province, date)
+    frames = parse_files(files, since=since, workers=workers, until=until, parser=series.parser)
+
+    df = join_frames(frames, keys=series.join_keys)
+    df.rename(columns={"dates":'date'}, inplace=True)
+
+    return df
+
+def count_csv_rows(csv_path):
+    """ Returns number of data rows in csv file, reads only the first column """
+    return len(pd.read_csv(csv_path, usecols=[0]))
+
+def date_windows(dates, since, dates_per_window):
+    """ Splits sorted dates into consecutive (since, until) windows of dates_per_window dates each """
+    for start in range(0, len(dates), dates_per_window):
+        until = dates[min(start + dates_per_window, len(dates)) - 1]
+        yield since, until
+        since = until
+
+def iter_time_series(files, since=None, batch_size=0, workers=0, series=GLOBAL_TIME):
+    """
+    Yields csv files of series as joined dataframes of about batch_size rows each, oldest dates first
+
+    Each batch is parsed from a window of date columns (rows x dates in window ~ batch_size), so
+    memory used by a batch does not grow with the number of date columns in the files. Every window
+    reads the files again, larger batches trade memory for fewer passes over the files.
+    """
+    # union of dates of all files, a date missing in one file is dropped by the join
+    dates = sorted(set().union(*(read_date_headers(f[0], since=since, n_id_columns=series.n_id_columns)[1] for f in files)))
+    n_rows = max(count_csv_rows(f[0]) for f in files)
+    dates_per_window = max(1, batch_size // max(1, n_rows))
+    
+    for window_since, window_until in date_windows(dates, since, dates_per_window):
+        yield parse_time_series(files, since=window_since, workers=workers, until=window_until, series=series)
+
+def load_time_series(files, file_states, workers=0, snapshot_dir=None, series=GLOBAL_TIME):
+    """
+    Returns full history of csv files of series, read from snapshot if csv files are unchanged since it was taken
+
+    Snapshot of parsed dataframe is saved after parsing, keyed by blob shas in file_states.
+    """
+    snapshot_dir = snapshot.SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+
+    if not snapshot_dir:
+        return parse_time_series(files, workers=workers, series=series)
+
+    key = snapshot.snapshot_key(file_states)
+    df = snapshot.load_snapshot(series.name, key, snapshot_dir)
+
+    if df is None:
+        df = parse_time_series(files, workers=workers, series=series)
+        snapshot.save_snapshot(df, series.name, key, snapshot_dir)
+    else:
+        print("Loaded parsed csv files from snapshot.")
+
+    return df
+
+def revision_since(watermark, revision_days):
+    """ Returns date after which date columns are upserted again, None for the whole history if nothing was imported yet """
+    if watermark is None:
+        return None
+    
+    return watermark - timedelta(days=revision_days)
+
+def import_time_series(series, engine=None, full=False, path=TIME_SERIES_PATH, workers=0, reload=False, batch_size=0, revision_days=REVISION_DAYS):
+    """
+    Imports csv files of series into table of series
+
+    Import is skipped if none of the csv files changed since the last import (by git blob sha).
+    Otherwise only date columns from revision_days before the last imported date (watermark)
+    onwards are parsed and upserted, since JHU revises counts of recent days in place, 0 parses
+    new dates only. If full is set the whole history is upserted again. Upserting on the key of
+    series, e.g. (location_id, date), keeps imports idempotent and writes only new days and days
+    whose counts were revised. Csv files are recorded as imported once all their rows are loaded.
+
+    If reload is set, the table is rebuilt from the full history in a staging copy that is swapped
+    in once complete, so readers never see a half filled table.
+
+    Full history is read from a columnar snapshot when the csv files match the snapshot.
+    
+    If batch_size is set, dates are parsed and loaded in batches of
+    about batch_size rows instead of all at once, which bounds memory for long histories. Reloads
+    always load the whole frame since the staging copy is validated against it.
+    
+    Tables derived from the series (refresh of series, e.g. country and world rollups of global_time)
+    are recomputed once all frames are loaded.
+    """
+    print("Importing {} csv files into database...".format(series.name))
 
     # create connection to database using SQLAlchemy
     # will use env var unless running straight from terminal, then attach to dev db
-    engine = create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db"), echo=False)
+    if engine is None:
+        engine = create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db"), echo=False)
 
     # return latest csv file in folder
-    csv_path_confirmed = path + "/time_series_covid19_confirmed_global.csv"
-    csv_path_deaths = path + "/time_series_covid19_deaths_global.csv"
-    csv_path_recovered = path + "/time_series_covid19_recovered_global.csv"
-    files = [(csv_path_confirmed, "confirmed"), (csv_path_deaths, "deaths"), (csv_path_recovered, "recovered")]
+    files = [(path + "/" + file_name, case_type) for file_name, case_type in series.files]
+
+    # skip import if csv files are the same as in last import
+    file_states, changed = check_files(engine, [f[0] for f in files])
+    full = full or reload
 
-    # obtain dataframes
-    frames = [parse_cases(f[0], f[1]) for f in files]
+    if not full and not changed:
+        set_file_states(engine, file_states)  # refresh size and mtime of touched files so next check is a stat only
+        print("Csv files unchanged since last import, skipping.")
+        return
 
-    df_global_time = functools.reduce(lambda left, right: pd.merge(left, right, on=["dates", "country_name", "province"], how="inner"), frames)
-    df_global_time.rename(columns={"dates":'date'}, inplace=True)
+    # changed files may revise recent days, so a window of days before the last import is parsed again
+    since = None if full else revision_since(get_watermark(engine, series.name), revision_days)
+    print("Importing dates after {}...".format(since) if since else "Importing full history...")
 
-    # load df into db
-    df_global_time.to_sql("global_time", con=engine, if_exists='append', chunksize=1000, index=False)
+    loader = get_loader(engine)
+    
+    if reload:
+        # replace whole table through validated staging copy, staging is validated against the whole frame
+        frames = [load_time_series(files, file_states, workers=workers, series=series)]
+    elif batch_size:
+        # parse and load a window of dates at a time so that memory stays bounded
+        frames = iter_time_series(files, since=since, batch_size=batch_size, workers=workers, series=series)
+    elif since is None:
+        frames = [load_time_series(files, file_states, workers=workers, series=series)]
+    else:
+        frames = [parse_time_series(files, since=since, workers=workers, series=series)]
+    
+    imported_rows = 0
+    oldest_date = None
+    
+    for df in frames:
+        if df.empty:
+            continue
+        
+        if series.resolve_keys is not None:
+            df = series.resolve_keys(engine, df)
+        
+        if reload:
+            loader.reload(series.name, df, key_columns=series.key_columns)
+        else:
+            # load df into db with bulk loader of db backend, only days that are new or whose counts changed are written
+            loader.load(series.name, df, key_columns=series.key_columns)
+        
+        # move watermark to the latest imported date, batches are in date order so an interrupted import resumes from here
+        set_watermark(engine, series.name, df["date"].max().to_pydatetime())
+        imported_rows += len(df)
+        oldest_date = df["date"].min() if oldest_date is None else min(oldest_date, df["date"].min())
     
-    print("Import complete.")
\ No newline at end of file
+    # tables derived from series, e.g. rollups, are recomputed from the oldest imported date, or all of them after a full history import
+    if series.refresh is not None and imported_rows:
+        series.refresh(engine, None if since is None else oldest_date.date())
+    
+    # record imported csv files, only now that all of their rows are loaded
+    set_file_states(engine, file_states)
+
+    print("Import complete." if imported_rows else "No new dates to import.")
+
+
+# dataset name to its csv files, parser and table key
+DATASETS = {
+    GLOBAL_TIME.name: GLOBAL_TIME,
+    US_TIME.name: US_TIME
+}
+
+def import_tables_from_csv(engine=None, full=False, path=TIME_SERIES_PATH, workers=0, reload=False, batch_size=0, revision_days=REVISION_DAYS):
+    """
+    Imports time series covid files of every dataset into current db, see import_time_series
+
+    Datasets whose csv files are not in path are skipped, e.g. a checkout without the US files.
+    """
+    for series in DATASETS.values():
+        if not all(os.path.exists(path + "/" + file_name) for file_name in series.file_names):
+            print("Csv files of {} not found in {}, skipping.".format(series.name, path))
+            continue
+        
+        import_time_series(series, engine=engine, full=full, path=path, workers=workers, reload=reload, batch_size=batch_size, revision_days=revision_days)
+
+def import_changed_files(changed_files, engine=None, path=TIME_SERIES_PATH, workers=0, batch_size=0, reports_path=DAILY_REPORTS_PATH, revision_days=REVISION_DAYS):
+    """
+    Imports only datasets that have at least one file in changed_files, e.g. files changed by a git pull
+
+    Changed daily report files are imported into daily_report, see import_daily_reports.
+
+    Returns list of names of imported datasets
+    """
+    changed_file_names = {os.path.basename(f) for f in changed_files}
+    imported = []
+
+    for dataset, series in DATASETS.items():
+        # all files of a dataset are merged into one table, so dataset is imported as a whole
+        if changed_file_names.intersection(series.file_names):
+            import_time_series(series, engine=engine, path=path, workers=workers, batch_size=batch_size, revision_days=revision_days)
+            imported.append(dataset)
+
+    # report files have dates as names, so they are told apart by folder
+    if any(f.startswith(DAILY_REPORTS_DIR + "/") for f in changed_files):
+        import_daily_reports(engine=engine, path=reports_path, workers=workers)
+        imported.append("daily_report")
+
+    if not imported:
+        print("No imported dataset changed.")
+
+    return imported
@@ -0,0 +1,58 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Location dimension of global_time
+
+Country and province names are stored once per location in the location table and
+days reference them by location_id. Parsed frames carry names, they are replaced by
+location ids right before loading, adding locations that are not in the table yet.
+"""
+
+import pandas as pd
+from sqlalchemy import MetaData, Table, select
+
+LOCATION_COLUMNS = ["country_name", "province"]
+
+def read_locations(conn, table):
+    """ Returns df of all locations with columns country_name, province and location_id """
+    rows = conn.execute(select([table.c.country_name, table.c.province, table.c.id])).fetchall()
+    return pd.DataFrame([tuple(row) for row in rows], columns=LOCATION_COLUMNS + ["location_id"])
+
+def resolve_locations(engine, df):
+    """
+    Returns df with country_name and province replaced by location_id
+
+    Locations of df that are not in the location table are inserted first. There are a few
+    hundred locations, so the whole table is read instead of looking up each location.
+    """
+    table = Table("location", MetaData(), autoload_with=engine)
+    locations = df[LOCATION_COLUMNS].drop_duplicates().astype(str)
+
+    with engine.begin() as conn:
+        known = read_locations(conn, table)
+        missing = locations.merge(known, on=LOCATION_COLUMNS, how="left")
+        missing = missing[missing["location_id"].isna()]
+
+        if len(missing):
+            conn.execute(table.insert(), missing[LOCATION_COLUMNS].to_dict("records"))
+            known = read_locations(conn, table)
+
+    # names become one integer per row, order of rows is kept
+    keys = pd.MultiIndex.from_arrays([df[column] for column in LOCATION_COLUMNS])
+    location_ids = known.set_index(LOCATION_COLUMNS)["location_id"].reindex(keys).to_numpy().astype("int32")
+
+    result = df.drop(columns=LOCATION_COLUMNS)
+    result.insert(0, "location_id", location_ids)
+    return result
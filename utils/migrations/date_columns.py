@@ -0,0 +1,57 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: date columns stored as DATE instead of DATETIME
+
+Days and report dates never have a time, storing them as DATE makes rows and index
+entries smaller. Postgres and MySQL change the column type in place. SQLite keeps the
+declared type but stores dates as YYYY-MM-DD text, the format the ORM writes and
+compares against, so the time part of existing values is cut off. Tables that do
+not exist yet are skipped, running the migration again changes nothing.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.date_columns
+"""
+
+import os
+from sqlalchemy import create_engine, inspect
+
+DATE_COLUMNS = [
+    ("global_time", "date"),
+    ("us_time", "date"),
+    ("daily_report", "report_date")
+]
+
+def upgrade(engine):
+    tables = inspect(engine).get_table_names()
+    
+    with engine.begin() as conn:
+        for table, column in DATE_COLUMNS:
+            if table not in tables:
+                continue
+            
+            if conn.dialect.name == "sqlite":
+                conn.execute("UPDATE {0} SET {1} = substr({1}, 1, 10) WHERE length({1}) > 10".format(table, column))
+            elif conn.dialect.name == "postgresql":
+                conn.execute("ALTER TABLE {0} ALTER COLUMN {1} TYPE DATE USING {1}::date".format(table, column))
+            elif conn.dialect.name == "mysql":
+                conn.execute("ALTER TABLE {0} MODIFY {1} DATE NOT NULL".format(table, column))
+            
+            print("Converted {}.{} to date.".format(table, column))
+    
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
@@ -0,0 +1,52 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: lookup indexes on global_time
+
+db.create_all only creates indexes together with a new table, so databases created
+before the indexes were declared on GlobalTime get them from here. Indexes that already
+exist are skipped. Indexes are listed here rather than taken from the model, since
+location_dimension later replaced the name columns they were built on.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.global_time_indexes
+"""
+
+import os
+from sqlalchemy import create_engine, inspect, MetaData, Table, Index
+
+# unique key is added by unique_global_time, which also removes duplicates first
+INDEXES = [
+    ("ix_global_time_country_name_date", ("country_name", "date")),
+    ("ix_global_time_date_country_name", ("date", "country_name")),
+    ("ix_global_time_province", ("province",))
+]
+
+def upgrade(engine):
+    if "country_name" not in [column["name"] for column in inspect(engine).get_columns("global_time")]:
+        print("Names already moved to location table, nothing to index.")
+        return
+    
+    with engine.begin() as conn:
+        table = Table("global_time", MetaData(), autoload_with=conn)
+        
+        for name, columns in INDEXES:
+            Index(name, *(table.c[column] for column in columns)).create(conn, checkfirst=True)
+            print("Created index {} if missing.".format(name))
+    
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
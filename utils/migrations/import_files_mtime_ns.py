@@ -0,0 +1,58 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: mtime in nanoseconds on import_files
+
+Replaces the float mtime column by an integer mtime_ns column, a FLOAT column of MySQL
+rounds mtimes so that every file was hashed again on every import. Recorded blob shas
+are kept, mtime_ns starts at 0 so each file is hashed once more on the next import.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.import_files_mtime_ns
+"""
+
+import os
+from sqlalchemy import create_engine, inspect, MetaData, Table, select, literal
+
+from utils.import_state import import_files
+
+def upgrade(engine):
+    inspector = inspect(engine)
+    
+    if "import_files" not in inspector.get_table_names():
+        print("Table import_files does not exist yet, nothing to migrate.")
+        return
+    
+    if "mtime_ns" in [column["name"] for column in inspector.get_columns("import_files")]:
+        print("Column mtime_ns already exists, nothing to migrate.")
+        return
+    
+    # rebuild table, older sqlite cannot drop columns
+    old = Table("import_files", MetaData(), autoload_with=engine)
+    new = import_files.to_metadata(MetaData(), name="import_files_new")
+    
+    with engine.begin() as conn:
+        new.create(conn)
+        conn.execute(new.insert().from_select(
+            ["file_name", "blob_sha", "size", "mtime_ns"],
+            select([old.c.file_name, old.c.blob_sha, old.c.size, literal(0)])
+        ))
+        old.drop(conn)
+        conn.execute("ALTER TABLE import_files_new RENAME TO import_files")
+    
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
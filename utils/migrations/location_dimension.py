@@ -0,0 +1,80 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: location dimension of global_time
+
+Moves country_name and province of global_time into the location table. Each distinct
+location is added once, days get its id in location_id, then indexes on the name columns
+and the name columns themselves are dropped. Run after unique_global_time.
+
+On SQLite location_id is left nullable since SQLite cannot alter a column, it is filled
+for every existing day and the ORM never writes a day without a location.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.location_dimension
+"""
+
+import os
+from sqlalchemy import create_engine, inspect, MetaData, Table, Index
+
+from api.models import Location
+
+NAME_COLUMNS = ("country_name", "province")
+
+def upgrade(engine):
+    if "location_id" in [column["name"] for column in inspect(engine).get_columns("global_time")]:
+        print("Location dimension already exists.")
+        return
+    
+    with engine.begin() as conn:
+        Location.__table__.create(conn, checkfirst=True)
+        
+        conn.execute("""
+            INSERT INTO location (country_name, province)
+            SELECT DISTINCT country_name, COALESCE(province, '') FROM global_time
+            """)
+        
+        conn.execute("ALTER TABLE global_time ADD COLUMN location_id INTEGER REFERENCES location (id)")
+        updated = conn.execute("""
+            UPDATE global_time SET location_id = (
+                SELECT location.id FROM location
+                WHERE location.country_name = global_time.country_name
+                AND location.province = COALESCE(global_time.province, '')
+            )
+            """).rowcount
+        print("Linked {} days to locations.".format(updated))
+        
+        if conn.dialect.name == "postgresql":
+            conn.execute("ALTER TABLE global_time ALTER COLUMN location_id SET NOT NULL")
+        elif conn.dialect.name == "mysql":
+            conn.execute("ALTER TABLE global_time MODIFY location_id INTEGER NOT NULL")
+        
+        # indexes on name columns have to go before the columns can be dropped
+        table = Table("global_time", MetaData(), autoload_with=conn)
+        for index in list(table.indexes):
+            if any(column.name in NAME_COLUMNS for column in index.columns):
+                index.drop(conn)
+                print("Dropped index {}.".format(index.name))
+        
+        for column in NAME_COLUMNS:
+            conn.execute("ALTER TABLE global_time DROP COLUMN {}".format(column))
+        
+        Index("uq_global_time_location_date", table.c.location_id, table.c.date, unique=True).create(conn)
+        Index("ix_global_time_date_location", table.c.date, table.c.location_id).create(conn)
+    
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
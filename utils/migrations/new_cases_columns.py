@@ -0,0 +1,44 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: new cases columns on global_time
+
+Adds new_confirmed, new_deaths and new_recovered. Existing days are left empty
+until the next full import (flask import-data --full) computes them.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.new_cases_columns
+"""
+
+import os
+from sqlalchemy import create_engine, inspect
+
+COLUMNS = ("new_confirmed", "new_deaths", "new_recovered")
+
+def upgrade(engine):
+    existing = [column["name"] for column in inspect(engine).get_columns("global_time")]
+    
+    with engine.begin() as conn:
+        for column in COLUMNS:
+            if column in existing:
+                continue
+            
+            conn.execute("ALTER TABLE global_time ADD COLUMN {} INTEGER".format(column))
+            print("Added column {}.".format(column))
+    
+    print("Migration complete. Run a full import to fill in new cases of existing days.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
@@ -0,0 +1,55 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Migration: unique (country_name, province, date) key on global_time
+
+Earlier imports appended the full history on every start, so existing databases
+contain duplicate days. Keeps the latest row of each day and adds the unique index.
+
+Usage:
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.migrations.unique_global_time
+"""
+
+import os
+from sqlalchemy import create_engine, inspect
+
+INDEX_NAME = "uq_global_time_country_province_date"
+
+def upgrade(engine):
+    if "country_name" not in [column["name"] for column in inspect(engine).get_columns("global_time")]:
+        print("Days already keyed by location, see location_dimension.")
+        return
+    
+    if INDEX_NAME in [index["name"] for index in inspect(engine).get_indexes("global_time")]:
+        print("Unique index already exists.")
+        return
+    
+    with engine.begin() as conn:
+        # derived table is required by MySQL to delete from table used in subquery
+        deleted = conn.execute("""
+            DELETE FROM global_time WHERE id NOT IN (
+                SELECT id FROM (
+                    SELECT MAX(id) AS id FROM global_time GROUP BY country_name, province, date
+                ) AS keep
+            )
+            """).rowcount
+        print("Removed {} duplicate days.".format(deleted))
+        
+        conn.execute("CREATE UNIQUE INDEX {} ON global_time (country_name, province, date)".format(INDEX_NAME))
+    
+    print("Migration complete.")
+
+if __name__ == "__main__":
+    upgrade(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
@@ -1,5 +1,6 @@
 # takes in timeseries csv file as input and returns df with col. headers corresponding to model
 import csv
+import numpy as np
 import pandas as pd
 from collections import defaultdict
 
@@ -44,50 +45,140 @@ def parse_countries(csv_to_parse):
 
     return df
 
-def parse_cases(csv_to_parse, case_type):
+def parse_date_headers(date_columns):
+    # jhu headers are M/D/YY, fall back to inference for anything else (e.g. M/D/YYYY)
+    try:
+        return pd.to_datetime(date_columns, format="%m/%d/%y")
+    except ValueError:
+        return pd.to_datetime(date_columns)
+
+def read_date_headers(csv_to_parse, since=None, until=None, n_id_columns=4):
+    # returns id column headers and series of parsed dates indexed by date column header, reads the header row only
+    # if since is given only dates after since are kept, if until is given only dates up to and including until
+    # assume first n_id_columns columns are ids (global files: province, country, lat and long)
+    headers = list(pd.read_csv(csv_to_parse, nrows=0).columns)
+    
+    # callable to find number of id columns from headers, e.g. US files differ in id columns
+    if callable(n_id_columns):
+        n_id_columns = n_id_columns(headers)
+    
+    parsed_dates = pd.Series(parse_date_headers(headers[n_id_columns:]), index=headers[n_id_columns:])
+    
+    if since is not None:
+        parsed_dates = parsed_dates[parsed_dates > pd.Timestamp(since)]
+    
+    if until is not None:
+        parsed_dates = parsed_dates[parsed_dates <= pd.Timestamp(until)]
+    
+    return headers[:n_id_columns], parsed_dates
+
+def normalise_names(names):
+    # lowercase names and replace spaces with underscores, returns categorical
+    return names.str.lower().str.replace(' ', '_', regex=False).astype("category")
+
+def repeat_categorical(categorical, repeats):
+    # repeats each value of a categorical series repeats times, on codes only
+    return pd.Categorical.from_codes(np.repeat(categorical.cat.codes.to_numpy(), repeats), categories=categorical.cat.categories)
+
+def long_dates(parsed_dates, n_rows):
+    # returns ordered categorical of dates for n_rows rows of parsed date columns, date by date within a row
+    # ordered so that min/max of the date column work on the codes
+    date_categories = pd.DatetimeIndex(parsed_dates.unique()).sort_values()
+    date_codes = date_categories.get_indexer(pd.DatetimeIndex(parsed_dates.to_numpy()))
+    return pd.Categorical.from_codes(np.tile(date_codes, n_rows), categories=date_categories, ordered=True)
+
+def parse_cases(csv_to_parse, case_type, since=None, until=None, new_cases=False):
     # applies to confirmed, deaths and recovered csv files
     # takes csv and case type (confirmed, deaths and recovered) and return df with dates, countries
     # and cases with header corresponding to header
-    data = defaultdict(list)
+    # if since is given, only date columns after since are parsed, if until is given only date columns up to until
+    # reads the file once and reshapes it column-wise instead of walking every cell in python
+    # names and dates are categorical (small int codes into one copy of each value) and counts are int32
+    # so that a long frame takes ~12 bytes per row instead of ~40 plus a python string per name
+    # if new_cases is set, new_<case_type> holds cases added since the previous date column, the column
+    # just before since is read as well so that the first parsed date is differenced too, the first date
+    # of the file is differenced against zero. corrections by jhu show up as negative new cases
     
-    with open(csv_to_parse) as csv_file:
-        csv_reader = csv.DictReader(csv_file, delimiter=",")
-        
-        for row in csv_reader:  # row read as {col1: value1, col2:value2, ...}
-            
-            curr_country = ""
-            curr_province = ""
-            
-            for key, value in row.items():
-                if key == "Country/Region" or key == "Province/State":
-                    # no need to append to country/region here, add country_region only when date is added
-                    if key == "Country/Region":
-                        curr_country = value.lower().replace(' ', '_')
-                    else:
-                        curr_province = value.lower().replace(' ', '_')
-                elif key == "Lat" or key == "Long":
-                    continue
-                else:
-                    # header is a date, value are the cases
-                    data["Dates"].append(pd.to_datetime(key))
-                    data["Cases"].append(int(value))
-                    
-                    # add additional elements to Country/Region and Province lists
-                    data["Country/Region"].append(curr_country)
-                    data["Province/State"].append(curr_province)
-    
-    # order df
-    df = pd.DataFrame(data, columns=["Dates", "Country/Region", "Province/State", "Cases"])
-    
-    # rename headers
-    df.rename(columns=
-              {
-                "Dates": "dates", 
-                "Country/Region": "country_name",
-                "Province/State": "province", 
-                "Cases": "{}".format(case_type)
-            },
-              inplace=True
-            )
-    
-    return df
\ No newline at end of file
+    # assume first 4 columns (up to D) are province, country, lat and long
+    # all other columns after that contain the date range
+    id_columns, parsed_dates = read_date_headers(csv_to_parse, until=until)
+    
+    context_columns = []
+    
+    if since is not None:
+        context_columns = list(parsed_dates[parsed_dates <= pd.Timestamp(since)].index[-1:]) if new_cases else []
+        parsed_dates = parsed_dates[parsed_dates > pd.Timestamp(since)]
+    
+    date_columns = list(parsed_dates.index)
+    
+    dtype = {column: "int32" for column in context_columns + date_columns}
+    dtype.update({"Province/State": str, "Country/Region": str})
+    
+    df_wide = pd.read_csv(
+        csv_to_parse,
+        usecols=id_columns + context_columns + date_columns,
+        dtype=dtype,
+        keep_default_na=False
+    )
+    
+    # normalise names once per row rather than once per cell
+    countries = normalise_names(df_wide["Country/Region"])
+    provinces = normalise_names(df_wide["Province/State"])
+    
+    # wide-to-long reshape: one row per (country, province, date)
+    # row-major ravel of the date columns reads row by row, date by date, so no sort is needed
+    n_rows, n_dates = len(df_wide), len(date_columns)
+    counts = df_wide[date_columns].to_numpy(dtype="int32")
+    
+    df = pd.DataFrame({
+        "dates": long_dates(parsed_dates, n_rows),
+        "country_name": repeat_categorical(countries, n_dates),
+        "province": repeat_categorical(provinces, n_dates),
+        "{}".format(case_type): counts.ravel()
+    })
+    
+    if new_cases:
+        # a row is one location, so differencing along the row is the group-wise diff by location
+        previous = df_wide[context_columns].to_numpy(dtype="int32") if context_columns else np.zeros((n_rows, 1), dtype="int32")
+        df["new_{}".format(case_type)] = np.diff(counts, axis=1, prepend=previous).ravel()
+    
+    return df
+
+def count_us_id_columns(headers):
+    # US files have UID ... Combined_Key as id columns, deaths file has Population as well
+    n_id_columns = headers.index("Combined_Key") + 1
+    return n_id_columns + 1 if headers[n_id_columns] == "Population" else n_id_columns
+
+def parse_us_cases(csv_to_parse, case_type, since=None, until=None):
+    # applies to confirmed_US and deaths_US csv files, one row per county (Admin2) and date
+    # returns df with dates, uid, fips, county, province_state and cases of case type
+    # same columnar reshape as parse_cases, see there for since, until and dtypes
+    id_columns, parsed_dates = read_date_headers(csv_to_parse, since=since, until=until, n_id_columns=count_us_id_columns)
+    date_columns = list(parsed_dates.index)
+    
+    dtype = {column: "int32" for column in date_columns}
+    dtype.update({"UID": "int64", "FIPS": str, "Admin2": str, "Province_State": str})
+    
+    df_wide = pd.read_csv(
+        csv_to_parse,
+        usecols=["UID", "FIPS", "Admin2", "Province_State"] + date_columns,
+        dtype=dtype,
+        keep_default_na=False
+    )
+    
+    # fips is written as float (e.g. 1001.0), stored as 5 digit code (e.g. 01001), empty for rows without one
+    fips = df_wide["FIPS"].str.split(".", n=1).str[0]
+    fips = fips.where(fips == "", fips.str.zfill(5)).astype("category")
+    
+    n_rows, n_dates = len(df_wide), len(date_columns)
+    
+    df = pd.DataFrame({
+        "dates": long_dates(parsed_dates, n_rows),
+        "uid": np.repeat(df_wide["UID"].to_numpy(), n_dates),
+        "fips": repeat_categorical(fips, n_dates),
+        "county": repeat_categorical(normalise_names(df_wide["Admin2"]), n_dates),
+        "province_state": repeat_categorical(normalise_names(df_wide["Province_State"]), n_dates),
+        "{}".format(case_type): df_wide[date_columns].to_numpy(dtype="int32").ravel()
+    })
+    
+    return df
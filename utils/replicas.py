@@ -0,0 +1,121 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Read replica routing
+
+Replicas are configured as SQLALCHEMY_BINDS named replica_0, replica_1, ... Queries of
+GET requests run on one replica per session, everything else (writes, POST/PUT/DELETE
+requests, CLI commands and imports) runs on SQLALCHEMY_DATABASE_URI. Flushes always go
+to the primary, so replicas are only ever read.
+
+Replicas lag behind the primary. After a successful write the client gets a cookie that
+sends its reads to the primary for REPLICA_STICKY_SECONDS, so it reads its own writes.
+"""
+
+import random
+import time
+
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import orm
+
+from utils.sqlite_profile import enable_wal_profile, read_only_url
+
+REPLICA_PREFIX = "replica_"
+STICKY_COOKIE = "read_primary_until"
+READ_METHODS = ("GET", "HEAD")
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+def replica_binds(uris):
+    """ Returns SQLALCHEMY_BINDS of comma separated replica uris, empty if uris is not set """
+    uris = [uri.strip() for uri in (uris or "").split(",") if uri.strip()]
+    return {"{}{}".format(REPLICA_PREFIX, i): uri for i, uri in enumerate(uris)}
+
+def replica_keys(app):
+    """ Returns bind keys of the replicas configured on app """
+    return sorted(key for key in (app.config.get("SQLALCHEMY_BINDS") or {}) if key.startswith(REPLICA_PREFIX))
+
+def reads_primary():
+    """ Returns True if the client of the current request wrote recently and must read from the primary """
+    until = request.cookies.get(STICKY_COOKIE)
+
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+class RoutingSession(SignallingSession):
+    """ Session running queries of GET requests on a replica and everything else on the primary """
+
+    def __init__(self, db, **options):
+        super().__init__(db, **options)
+        self._replica_key = None  # chosen on first read, a session reads from one replica only
+
+    def replica_key(self):
+        """ Returns bind key of the replica to read from, None if reads go to the primary """
+        if self._flushing or not has_request_context() or request.method not in READ_METHODS:
+            return None
+
+        keys = replica_keys(self.app)
+
+        if not keys or reads_primary():
+            return None
+
+        if self._replica_key not in keys:
+            self._replica_key = random.choice(keys)
+
+        return self._replica_key
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        key = self.replica_key()
+
+        if key is not None:
+            return get_state(self.app).db.get_engine(self.app, bind=key)
+
+        return super().get_bind(mapper, clause)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    SQLAlchemy extension whose sessions route reads of GET requests to replicas
+
+    SQLite engines use the WAL profile of utils.sqlite_profile when SQLITE_WAL is set
+    and open the db file read only when SQLITE_READ_ONLY is set.
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        if sa_url.get_backend_name() != "sqlite" or sa_url.database in (None, "", ":memory:"):
+            return super().create_engine(sa_url, engine_opts)
+
+        config = self.get_app().config
+        read_only = bool(config.get("SQLITE_READ_ONLY"))
+
+        # path is absolute at this point, made so by apply_driver_hacks
+        engine = super().create_engine(read_only_url(sa_url) if read_only else sa_url, engine_opts)
+
+        if config.get("SQLITE_WAL"):
+            enable_wal_profile(engine, read_only=read_only)
+
+        return engine
+
+def stick_to_primary(response):
+    """ after_request hook, sends reads of a client that just wrote to the primary for REPLICA_STICKY_SECONDS """
+    if request.method in WRITE_METHODS and response.status_code < 400 and replica_keys(current_app):
+        seconds = current_app.config.get("REPLICA_STICKY_SECONDS", 5)
+        response.set_cookie(STICKY_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True)
+
+    return response
@@ -0,0 +1,66 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Country and world rollups of global_time
+
+country_time sums the provinces of each country per day and world_time sums all countries
+per day. Both are refreshed by the db with GROUP BY after global_time is imported, only
+days from the oldest imported date onwards are recomputed. Days of a refreshed range are
+deleted and inserted again in one transaction, so readers see either the old or the new sums.
+
+Usage (refreshes all days, e.g. after creating the tables on an existing db):
+SQLALCHEMY_DATABASE_URI=sqlite:///api/site.db python -m utils.rollups
+"""
+
+import os
+from sqlalchemy import create_engine, text, bindparam, Date
+
+COUNT_COLUMNS = ["confirmed", "deaths", "recovered", "new_confirmed", "new_deaths", "new_recovered"]
+
+def rollup_statements(since):
+    """ Returns delete and insert statements of country_time and world_time for days from since onwards """
+    where = " WHERE date >= :since" if since is not None else ""
+    where_days = " WHERE global_time.date >= :since" if since is not None else ""
+    columns = ", ".join(COUNT_COLUMNS)
+    sums = ", ".join("SUM({0})".format(column) for column in COUNT_COLUMNS)
+    day_sums = ", ".join("SUM(global_time.{0})".format(column) for column in COUNT_COLUMNS)
+
+    statements = [
+        "DELETE FROM country_time" + where,
+        "DELETE FROM world_time" + where,
+        # country days from province days, names are on location
+        "INSERT INTO country_time (country_name, date, {}) ".format(columns) +
+        "SELECT location.country_name, global_time.date, {} ".format(day_sums) +
+        "FROM global_time JOIN location ON location.id = global_time.location_id" + where_days +
+        " GROUP BY location.country_name, global_time.date",
+        # world days from the fewer country days
+        "INSERT INTO world_time (date, {0}) SELECT date, {1} FROM country_time{2} GROUP BY date".format(columns, sums, where)
+    ]
+
+    if since is None:
+        return [text(statement) for statement in statements]
+
+    return [text(statement).bindparams(bindparam("since", value=since, type_=Date)) for statement in statements]
+
+def refresh_rollups(engine, since=None):
+    """ Recomputes country_time and world_time for days from since onwards, all days if since is None """
+    print("Refreshing country and world rollups{}...".format(" from {}".format(since) if since else ""))
+
+    with engine.begin() as conn:
+        for statement in rollup_statements(since):
+            conn.execute(statement)
+
+if __name__ == "__main__":
+    refresh_rollups(create_engine(os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///api/site.db")))
@@ -1,4 +1,5 @@
 # import schedule
+import os
 import time
 from utils.update_csv_from_repo import update_csv_from_repo
 # from threading import Timer
@@ -6,6 +7,18 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 import atexit
 
+try:
+    import fcntl
+except ImportError:  # windows, single process development server only
+    fcntl = None
+
+# lock files shared by all worker processes
+LEADER_LOCK_PATH = os.getenv("SCHEDULER_LEADER_LOCK", "data/scheduler.lock")
+RUN_LOCK_PATH = os.getenv("SCHEDULER_RUN_LOCK", "data/refresh.lock")
+
+# lock file is kept open for lifetime of leader process, lock is released by OS when process exits
+_leader_lock = None
+
 # def scheduler():
 #     schedule.every().day.at("08:00").do(update_csv_from_repo)
 
@@ -20,15 +33,68 @@ import atexit
 #     Timer(interval=0.0, function=update_csv_from_repo).start()
 #     time.sleep(3600)
 
-def scheduler():
+def try_lock(path):
+    """ Takes exclusive lock on file at path without blocking, returns open lock file or None if lock is held elsewhere """
+    lock_file = open(path, "a")
+
+    if fcntl is None:
+        return lock_file
+
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+
+    return lock_file
+
+def acquire_leader_lock(path=None):
+    """ Elects current process as scheduler leader if no other process is leader, returns True if leader """
+    global _leader_lock
+
+    if _leader_lock is None:
+        _leader_lock = try_lock(path or LEADER_LOCK_PATH)
+
+    return _leader_lock is not None
+
+def run_exclusive(func, path=None):
+    """ Runs func unless a previous run still holds the run lock, returns True if func was run """
+    lock_file = try_lock(path or RUN_LOCK_PATH)
+
+    if lock_file is None:
+        print("Previous refresh still running, skipping.")
+        return False
+
+    try:
+        func()
+    finally:
+        lock_file.close()  # closing file releases lock
+
+    return True
+
+def scheduler(func=update_csv_from_repo):
+    """
+    Runs func every minute in a background thread, defaults to pulling csv files from repo
+
+    Only one process (the leader) runs the scheduler, the other workers only serve requests.
+    Runs never overlap: a run that is still going when the next one is due makes the next one skip.
+    """
+    if not acquire_leader_lock():
+        print("Scheduler is running in another process.")
+        return None
+
     scheduler = BackgroundScheduler()
     scheduler.start()
     scheduler.add_job(
-        func=update_csv_from_repo,
+        func=lambda: run_exclusive(func),
         trigger=IntervalTrigger(minutes=1),
         id='update_csv_from_repo',
-        replace_existing=True
+        replace_existing=True,
+        max_instances=1,  # never stack runs within the leader
+        coalesce=True  # collapse missed runs into one
     )
 
     # Shut down the scheduler when exiting the app
-    atexit.register(lambda: scheduler.shutdown())
\ No newline at end of file
+    atexit.register(lambda: scheduler.shutdown())
+
+    return scheduler
@@ -0,0 +1,123 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Columnar snapshots of parsed csv files
+
+A snapshot is a folder with one .npy file per column of a parsed dataframe, keyed by the
+git blob shas of the csv files it was parsed from. Numeric and datetime columns are read
+back memory-mapped, string and categorical columns are stored as categorical codes plus
+categories so they can be memory-mapped too. Re-parsing is only needed when a csv file changes.
+
+Layout:
+<snapshot_dir>/<dataset>-<key>/columns.json
+<snapshot_dir>/<dataset>-<key>/<column>.npy
+<snapshot_dir>/<dataset>-<key>/<column>.categories.npy (categorical columns only)
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# folder for snapshots, empty string disables snapshots
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/snapshots")
+
+# bumped whenever the layout changes so that older snapshots are not read back
+SNAPSHOT_FORMAT = 3
+
+def snapshot_key(file_states):
+    """ Returns key of snapshot for list of file states (dicts with file_name and blob_sha) """
+    h = hashlib.sha1("format:{}\n".format(SNAPSHOT_FORMAT).encode())
+    
+    for state in sorted(file_states, key=lambda state: state["file_name"]):
+        h.update("{}:{}\n".format(state["file_name"], state["blob_sha"]).encode())
+    
+    return h.hexdigest()
+
+def snapshot_path(snapshot_dir, dataset, key):
+    return os.path.join(snapshot_dir, "{}-{}".format(dataset, key))
+
+def save_snapshot(df, dataset, key, snapshot_dir=SNAPSHOT_DIR):
+    """ Saves df as snapshot of dataset under key, older snapshots of dataset are removed """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    
+    # write into temp folder and rename so readers never see a partial snapshot
+    tmp_path = tempfile.mkdtemp(dir=snapshot_dir)
+    ordered = []
+    
+    for column in df.columns:
+        values = df[column]
+        
+        if values.dtype == object or isinstance(values.dtype, pd.CategoricalDtype):
+            categorical = pd.Categorical(values)
+            categories = categorical.categories
+            
+            # string categories are saved as fixed width unicode, everything else (e.g. dates) as is
+            categories = np.asarray(categories, dtype=str) if categories.dtype == object else categories.to_numpy()
+            
+            np.save(os.path.join(tmp_path, "{}.npy".format(column)), categorical.codes)
+            np.save(os.path.join(tmp_path, "{}.categories.npy".format(column)), categories)
+            
+            if categorical.ordered:
+                ordered.append(column)
+        else:
+            np.save(os.path.join(tmp_path, "{}.npy".format(column)), values.to_numpy())
+    
+    with open(os.path.join(tmp_path, "columns.json"), "w") as f:
+        json.dump({"columns": list(df.columns), "ordered": ordered}, f)
+    
+    path = snapshot_path(snapshot_dir, dataset, key)
+    if os.path.exists(path):
+        shutil.rmtree(tmp_path)
+    else:
+        os.rename(tmp_path, path)
+    
+    # keep only latest snapshot of dataset
+    for name in os.listdir(snapshot_dir):
+        if name.startswith(dataset + "-") and os.path.join(snapshot_dir, name) != path:
+            shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
+
+def load_snapshot(dataset, key, snapshot_dir=SNAPSHOT_DIR):
+    """ Returns dataframe of snapshot of dataset under key with memory-mapped columns, or None if there is none """
+    path = snapshot_path(snapshot_dir, dataset, key)
+    
+    if not os.path.exists(path):
+        return None
+    
+    with open(os.path.join(path, "columns.json")) as f:
+        meta = json.load(f)
+    
+    columns = meta["columns"]
+    data = {}
+    
+    for column in columns:
+        values = np.load(os.path.join(path, "{}.npy".format(column)), mmap_mode="r")
+        categories_path = os.path.join(path, "{}.categories.npy".format(column))
+        
+        if os.path.exists(categories_path):
+            values = pd.Categorical.from_codes(
+                values,
+                categories=np.load(categories_path, mmap_mode="r"),
+                ordered=column in meta["ordered"]
+            )
+        
+        data[column] = values
+    
+    # dict keeps column order, passing columns= as well makes pandas densify datetime categoricals
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,67 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+SQLite engine profile for concurrent readers
+
+With the default rollback journal a writer locks the whole db file, so API requests wait
+for every import to commit. In WAL mode readers keep reading the last committed state
+while an import writes. Journal mode is stored in the db file, the other pragmas are set
+on each new connection.
+
+Read only engines open the db file with mode=ro, e.g. for API workers that never write.
+They do not switch the journal mode, the db has to be put in WAL mode by a writer once.
+"""
+
+from sqlalchemy import event
+
+# pragmas of every connection, cache_size in KiB when negative
+SQLITE_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",  # durable in WAL mode up to the last checkpoint, no fsync per commit
+    "PRAGMA mmap_size = 268435456",  # 256 MiB read through memory mapping instead of read() calls
+    "PRAGMA cache_size = -65536"  # 64 MiB page cache per connection
+)
+
+def read_only_url(url):
+    """ Returns sqlalchemy URL opening the sqlite file of url read only, url must have an absolute path """
+    return url.set(
+        database="file:{}".format(url.database),
+        query=dict(url.query, mode="ro", uri="true")
+    )
+
+def set_pragmas(dbapi_connection, read_only=False):
+    """ Puts the db in WAL mode unless read_only and sets SQLITE_PRAGMAS on a sqlite3 connection """
+    cursor = dbapi_connection.cursor()
+
+    try:
+        if not read_only:
+            cursor.execute("PRAGMA journal_mode = WAL")
+
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def enable_wal_profile(engine, read_only=False):
+    """ Sets WAL mode and SQLITE_PRAGMAS on each new connection of engine """
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        set_pragmas(dbapi_connection, read_only=read_only)
+
+    return engine
+
+def journal_mode(engine):
+    """ Returns journal mode of the db of a sqlite engine, e.g. wal or delete """
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA journal_mode").scalar().lower()
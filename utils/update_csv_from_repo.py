@@ -1,12 +1,139 @@
+import os
 import git
 
-def update_csv_from_repo():
-    """ Automates a Git pull command from https://github.com/CSSEGISandData/COVID-19.git """
-    local_repo_path = 'data/COVID-19'
-    remote_repo_path = 'https://github.com/CSSEGISandData/COVID-19.git'
-    
-    print("Executing Git pull request from {}...".format(remote_repo_path))
+# paths of local clone, upstream repo and imported folders within repo
+LOCAL_REPO_PATH = 'data/COVID-19'
+REMOTE_REPO_PATH = 'https://github.com/CSSEGISandData/COVID-19.git'
+TIME_SERIES_DIR = 'csse_covid_19_data/csse_covid_19_time_series'
+DAILY_REPORTS_DIR = 'csse_covid_19_data/csse_covid_19_daily_reports'
+DATA_DIRS = [TIME_SERIES_DIR, DAILY_REPORTS_DIR]
+
+def diff_data_files(commit_before, commit_after):
+    """ Returns sorted paths of files in imported folders added or modified between two commits """
+    # deleted files have nothing to import
+    diffs = commit_before.diff(commit_after, paths=DATA_DIRS)
+    return sorted(diff.b_path for diff in diffs if not diff.deleted_file)
+
+def remote_head(repo, branch=None):
+    """
+    Returns (branch, sha) of branch on origin using `git ls-remote`, without fetching any objects
+
+    If branch is None, branch that HEAD of origin points to is used
+    """
+    if branch is None:
+        # first line is e.g. 'ref: refs/heads/master\tHEAD'
+        symref = repo.git.ls_remote("--symref", "origin", "HEAD").splitlines()[0]
+        branch = symref.split()[1][len("refs/heads/"):]
+
+    refs = repo.git.ls_remote("origin", "refs/heads/" + branch)
+    return branch, refs.split()[0] if refs else None
+
+def is_managed_checkout(repo):
+    """ Checks if repo was created by clone_data_repo """
+    with repo.config_reader() as config:
+        return config.get_value("coviz", "managed", default=False) is True
+
+def write_sparse_checkout(repo):
+    """ Sets folders checked out by managed checkout to imported folders """
+    sparse_checkout_path = os.path.join(repo.git_dir, "info", "sparse-checkout")
+    os.makedirs(os.path.dirname(sparse_checkout_path), exist_ok=True)
+    with open(sparse_checkout_path, "w") as f:
+        f.writelines(data_dir + "/\n" for data_dir in DATA_DIRS)
+
+def clone_data_repo(local_repo_path=LOCAL_REPO_PATH, remote_repo_path=REMOTE_REPO_PATH, branch=None, depth=1):
+    """
+    Creates a managed checkout of data repo
+
+    Only the imported folders are checked out (sparse checkout) and only the last
+    `depth` commits are fetched (shallow fetch), instead of the full repo and history.
+    """
+    print("Cloning data files from {} into {}...".format(remote_repo_path, local_repo_path))
+
+    repo = git.Repo.init(local_repo_path)
+    repo.create_remote("origin", remote_repo_path)
+    branch, _ = remote_head(repo, branch)
+
+    with repo.config_writer() as config:
+        config.set_value("core", "sparseCheckout", "true")
+        config.set_value("coviz", "managed", "true")
+        config.set_value("coviz", "branch", branch)
+        config.set_value("coviz", "depth", depth)
+
+    write_sparse_checkout(repo)
+
+    repo.git.fetch("origin", branch, depth=depth)
+    repo.git.checkout("-B", branch, "FETCH_HEAD")
+
+    return repo
+
+def update_managed_checkout(repo):
+    """
+    Updates a managed checkout, returns paths of time series and daily report files that changed
+
+    Compares remote branch sha with HEAD first and skips the fetch if nothing is new.
+    """
+    with repo.config_reader() as config:
+        branch = config.get_value("coviz", "branch")
+        depth = config.get_value("coviz", "depth")
+
+    head_before = repo.head.commit
+    _, remote_sha = remote_head(repo, branch)
+
+    if remote_sha == head_before.hexsha:
+        print("Repo already up to date.")
+        return []
+
+    # old commit stays in object store after shallow fetch, so the two commits can still be diffed
+    repo.git.fetch("origin", branch, depth=depth)
+    head_after = repo.commit("FETCH_HEAD")
+    changed_files = diff_data_files(head_before, head_after)
+
+    # data repo is a read only mirror, move branch to fetched commit instead of merging
+    # sparse checkout is rewritten first so that checkouts made before a folder was imported pick it up
+    write_sparse_checkout(repo)
+    repo.git.reset("--hard", "FETCH_HEAD")
+
+    print("Fetched {}..{}, {} data files changed.".format(head_before.hexsha[:7], head_after.hexsha[:7], len(changed_files)))
+
+    return changed_files
+
+def update_csv_from_repo(local_repo_path=LOCAL_REPO_PATH, remote_repo_path=REMOTE_REPO_PATH):
+    """
+    Automates a Git pull command from https://github.com/CSSEGISandData/COVID-19.git
+
+    If local repo does not exist, a managed (sparse and shallow) checkout is created.
+    Managed checkouts are updated with a shallow fetch, full clones with a pull.
+
+    Returns list of paths (relative to repo) of time series and daily report files that were added or modified
+    """
+    if not os.path.exists(local_repo_path):
+        repo = clone_data_repo(local_repo_path, remote_repo_path)
+        return sorted(
+            item.path for item in repo.head.commit.tree.traverse()
+            if item.type == "blob" and any(item.path.startswith(data_dir + "/") for data_dir in DATA_DIRS)
+        )
 
     local_repo = git.Repo(local_repo_path)
+
+    if is_managed_checkout(local_repo):
+        print("Executing Git fetch from {}...".format(remote_repo_path))
+        return update_managed_checkout(local_repo)
+
+    print("Executing Git pull request from {}...".format(remote_repo_path))
+
+    head_before = local_repo.head.commit
+
     origin = local_repo.remote(name='origin')
-    origin.pull()
\ No newline at end of file
+    origin.pull()
+
+    head_after = local_repo.head.commit
+
+    if head_before == head_after:
+        print("Repo already up to date.")
+        return []
+
+    changed_files = diff_data_files(head_before, head_after)
+
+    print("Pulled {}..{}, {} data files changed.".format(head_before.hexsha[:7], head_after.hexsha[:7], len(changed_files)))
+
+    return changed_files
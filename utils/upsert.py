@@ -0,0 +1,73 @@
+# Copyright 2020 Jonathan Quah. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bulk upsert of dataframes using the native form of each dialect
+
+SQLite, Postgres - INSERT ... ON CONFLICT (key) DO UPDATE ... WHERE <values changed>
+MySQL - INSERT ... ON DUPLICATE KEY UPDATE (unchanged rows are not written by MySQL)
+
+Target table must have a unique index on key_columns.
+"""
+
+import pandas as pd
+from sqlalchemy import MetaData, Table, or_
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+
+def frame_to_records(df):
+    """ Converts df into list of dicts with native python values that every DBAPI can bind """
+    return df.astype(object).where(pd.notnull(df), None).to_dict("records")
+
+def upsert_statement(table, dialect_name, key_columns, value_columns):
+    """ Returns dialect specific INSERT statement which updates value_columns on key conflict """
+    if dialect_name in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+        stmt = insert(table)
+        
+        # only touch rows whose values changed
+        return stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={column: stmt.excluded[column] for column in value_columns},
+            where=or_(*[table.c[column].is_distinct_from(stmt.excluded[column]) for column in value_columns])
+        )
+    
+    elif dialect_name == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update(
+            {column: stmt.inserted[column] for column in value_columns}
+        )
+    
+    raise ValueError("upsert is not supported for dialect `{}`".format(dialect_name))
+
+def upsert_frame(engine, table_name, df, key_columns, chunksize=1000):
+    """
+    Inserts rows of df into table_name, updating existing rows with same key_columns
+    
+    Args:
+        engine: SQLAlchemy engine
+        table_name (str): name of existing table
+        df (DataFrame): rows to write, column names matching table columns
+        key_columns (list): columns of the unique key
+        chunksize (int): number of rows per executemany
+    """
+    table = Table(table_name, MetaData(), autoload_with=engine)
+    value_columns = [column for column in df.columns if column not in key_columns]
+    stmt = upsert_statement(table, engine.dialect.name, key_columns, value_columns)
+    
+    records = frame_to_records(df)
+    
+    # single transaction so a failed import leaves table untouched
+    with engine.begin() as conn:
+        for start in range(0, len(records), chunksize):
+            conn.execute(stmt, records[start:start + chunksize])